@@ -0,0 +1,29 @@
+"""Posts created_at and keyset index
+
+Revision ID: 5b1e0c7d9a41
+Revises: 2a7c3cd13319
+Create Date: 2026-10-18 10:12:03.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e0c7d9a41'
+down_revision = '2a7c3cd13319'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'posts',
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_column('posts', 'created_at')
@@ -0,0 +1,31 @@
+"""Posts reaction counters
+
+Revision ID: 8c3f2a6e1d57
+Revises: 5b1e0c7d9a41
+Create Date: 2026-10-18 11:02:41.530176
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f2a6e1d57'
+down_revision = '5b1e0c7d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('dislikes_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE posts SET "
+        "likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = posts.id), "
+        "dislikes_count = (SELECT count(*) FROM dislikes WHERE dislikes.post_id = posts.id)"
+    )
+
+
+def downgrade():
+    op.drop_column('posts', 'dislikes_count')
+    op.drop_column('posts', 'likes_count')
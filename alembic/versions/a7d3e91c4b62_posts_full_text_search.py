@@ -0,0 +1,59 @@
+"""Posts full-text search
+
+Revision ID: a7d3e91c4b62
+Revises: f2b8c6d1a9e3
+Create Date: 2026-10-18 12:48:19.734102
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e91c4b62'
+down_revision = 'f2b8c6d1a9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE posts_fts USING fts5("
+            "title, description, content='posts', content_rowid='rowid', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+            "INSERT INTO posts_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, description ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); "
+            "INSERT INTO posts_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); "
+            "END"
+        )
+        op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+        return
+    op.execute(
+        "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('russian', title || ' ' || description)) STORED"
+    )
+    op.execute("CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('posts_fts_insert', 'posts_fts_delete', 'posts_fts_update'):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE posts_fts")
+        return
+    op.execute("DROP INDEX ix_posts_search_vector")
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,30 @@
+"""Lookup indexes
+
+Revision ID: c5e1f8a2d394
+Revises: a7d3e91c4b62
+Create Date: 2026-10-18 13:21:52.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e1f8a2d394'
+down_revision = 'a7d3e91c4b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_lower_email', 'users', [sa.text('lower(email)')])
+    op.create_index('ix_posts_user_id_created_at_id', 'posts', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_likes_user_id_post_id', 'likes', ['user_id', 'post_id'])
+    op.create_index('ix_dislikes_user_id_post_id', 'dislikes', ['user_id', 'post_id'])
+
+
+def downgrade():
+    op.drop_index('ix_dislikes_user_id_post_id', table_name='dislikes')
+    op.drop_index('ix_likes_user_id_post_id', table_name='likes')
+    op.drop_index('ix_posts_user_id_created_at_id', table_name='posts')
+    op.drop_index('ix_users_lower_email', table_name='users')
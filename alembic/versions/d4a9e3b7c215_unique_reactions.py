@@ -0,0 +1,50 @@
+"""Unique reactions per user and post
+
+Revision ID: d4a9e3b7c215
+Revises: 8c3f2a6e1d57
+Create Date: 2026-10-18 11:48:19.204713
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a9e3b7c215'
+down_revision = '8c3f2a6e1d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Дубликаты, созданные до появления ограничения, удаляются,
+    # счетчики пересчитываются заново.
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in ('likes', 'dislikes'):
+        if sqlite:
+            op.execute(
+                f"DELETE FROM {table} WHERE EXISTS (SELECT 1 FROM {table} b "
+                f"WHERE b.post_id = {table}.post_id AND b.user_id = {table}.user_id "
+                f"AND b.id < {table}.id)"
+            )
+        else:
+            op.execute(
+                f"DELETE FROM {table} a USING {table} b "
+                f"WHERE a.post_id = b.post_id AND a.user_id = b.user_id AND a.id > b.id"
+            )
+    op.execute(
+        "UPDATE posts SET "
+        "likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = posts.id), "
+        "dislikes_count = (SELECT count(*) FROM dislikes WHERE dislikes.post_id = posts.id)"
+    )
+    # batch_alter_table: SQLite не умеет ALTER TABLE ADD CONSTRAINT
+    # и пересоздает таблицу, в Postgres это обычный ALTER TABLE.
+    for table in ('likes', 'dislikes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(f'uq_{table}_post_id_user_id', ['post_id', 'user_id'])
+
+
+def downgrade():
+    for table in ('dislikes', 'likes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'uq_{table}_post_id_user_id', type_='unique')
@@ -0,0 +1,34 @@
+"""Post rankings
+
+Revision ID: e9b4d2c7f180
+Revises: c5e1f8a2d394
+Create Date: 2026-10-18 13:58:33.118529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4d2c7f180'
+down_revision = 'c5e1f8a2d394'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_rankings',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('source_updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_post_rankings_score_id', 'post_rankings', ['score', 'id'])
+    op.create_index('ix_posts_updated_at_id', 'posts', ['updated_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_posts_updated_at_id', table_name='posts')
+    op.drop_index('ix_post_rankings_score_id', table_name='post_rankings')
+    op.drop_table('post_rankings')
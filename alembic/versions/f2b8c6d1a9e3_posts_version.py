@@ -0,0 +1,27 @@
+"""Posts version and updated_at
+
+Revision ID: f2b8c6d1a9e3
+Revises: d4a9e3b7c215
+Create Date: 2026-10-18 12:14:05.208841
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c6d1a9e3'
+down_revision = 'd4a9e3b7c215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('posts', sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    op.execute("UPDATE posts SET updated_at = created_at")
+
+
+def downgrade():
+    op.drop_column('posts', 'updated_at')
+    op.drop_column('posts', 'version')
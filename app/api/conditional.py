@@ -0,0 +1,77 @@
+"""Условные GET: ETag, Last-Modified и ответ 304.
+
+Валидаторы строятся из posts.version и posts.updated_at, поэтому проверить
+If-None-Match / If-Modified-Since можно запросом одних версий, не загружая
+лайки и дизлайки и не сериализуя тело ответа.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from typing import Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def post_etag(version: int, variant: str = "") -> str:
+    """ETag одного поста. variant - метка набора полей, см. PostFields.variant."""
+    if variant:
+        return f'"{version}:{variant}"'
+    return f'"{version}"'
+
+
+def page_etag(posts: Iterable, variant: str = "") -> str:
+    """ETag страницы постов: меняется при изменении состава или версии любого поста."""
+    digest = hashlib.sha1(variant.encode())
+    for post in posts:
+        digest.update(f"{post.id}:{post.version};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """Дата в формате HTTP. Время в БД хранится в UTC без часового пояса."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[datetime] = None, now: Optional[datetime] = None
+) -> dict[str, str]:
+    """ETag и Last-Modified.
+
+    Last-Modified точен до секунды, поэтому выставляется, только когда
+    секунда last_modified уже прошла: иначе изменение в ту же секунду дало бы
+    тот же Last-Modified и клиент с If-Modified-Since получал бы 304 со старой
+    копией. Без Last-Modified If-Modified-Since не проверяется, остается ETag.
+    """
+    headers = {"ETag": etag}
+    now = now or datetime.utcnow()
+    if last_modified is not None and last_modified.replace(microsecond=0) < now.replace(microsecond=0):
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """Проверить предусловия запроса. If-None-Match важнее If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
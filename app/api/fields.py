@@ -0,0 +1,72 @@
+"""Выбор полей поста в ответе: параметры fields и include.
+
+fields - поля поста через запятую, id выводится всегда; include - списки
+реакций через запятую. Из БД читаются только выбранные колонки (и ключи
+пагинации и валидаторов), а лайки и дизлайки - отдельными запросами по
+id постов страницы и только если они включены.
+"""
+from http import HTTPStatus
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Query
+
+POST_FIELDS = ("id", "title", "description", "user_id", "likes_count", "dislikes_count")
+POST_INCLUDES = ("likes", "dislikes")
+
+FIELDS_DESCRIPTION = "Поля поста через запятую: " + ", ".join(POST_FIELDS[1:]) + "; id выводится всегда."
+INCLUDE_DESCRIPTION = "Списки реакций через запятую: " + ", ".join(POST_INCLUDES) + "."
+
+
+class PostFields(NamedTuple):
+    """Поля и списки реакций поста в ответе, в порядке PostsResponse."""
+    fields: tuple[str, ...] = POST_FIELDS
+    include: tuple[str, ...] = ()
+
+    def variant(self, default_include: tuple[str, ...] = ()) -> str:
+        """Метка представления для ETag, пустая для представления по умолчанию."""
+        if self.fields == POST_FIELDS and self.include == default_include:
+            return ""
+        return ".".join(self.fields) + "+" + ".".join(self.include)
+
+
+def parse_names(value: Optional[str], allowed: tuple[str, ...], parameter: str) -> Optional[tuple[str, ...]]:
+    """Разобрать список через запятую, None - параметр не передан."""
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"Неизвестные значения {parameter}: {', '.join(sorted(unknown))}",
+        )
+    return tuple(name for name in allowed if name in names)
+
+
+def parse_fields(
+    fields: Optional[str], include: Optional[str], default_include: tuple[str, ...]
+) -> PostFields:
+    selected = parse_names(fields, POST_FIELDS, "fields")
+    if selected is not None and "id" not in selected:
+        selected = ("id",) + selected
+    included = parse_names(include, POST_INCLUDES, "include")
+    return PostFields(
+        POST_FIELDS if selected is None else selected,
+        default_include if included is None else included,
+    )
+
+
+def page_fields(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+) -> PostFields:
+    """Поля постов страницы: по умолчанию все, без списков реакций."""
+    return parse_fields(fields, include, ())
+
+
+def post_fields(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+) -> PostFields:
+    """Поля одного поста: по умолчанию все, вместе с лайками и дизлайками."""
+    return parse_fields(fields, include, POST_INCLUDES)
@@ -0,0 +1,32 @@
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, Extra, conlist
+
+BULK_MAX_ITEMS = 500
+
+
+class ReactionType(str, Enum):
+    like = "like"
+    dislike = "dislike"
+
+
+class ReactionAction(str, Enum):
+    create = "create"
+    delete = "delete"
+
+
+class ReactionItemRequest(BaseModel):
+    post_id: UUID
+    reaction: ReactionType
+    action: ReactionAction
+
+    class Config:
+        extra = Extra.forbid
+
+
+class ReactionsBulkRequest(BaseModel):
+    items: conlist(ReactionItemRequest, min_items=1, max_items=BULK_MAX_ITEMS)
+
+    class Config:
+        extra = Extra.forbid
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -6,12 +7,45 @@ from .dislikes import DislikesResponse
 
 
 class PostsResponse(BaseModel):
+    """Все поля, кроме id, могут отсутствовать при выборе полей через fields."""
     id: UUID
-    title: str
-    description: str
-    user_id: UUID
-    likes: list[LikesResponse]
-    dislikes: list[DislikesResponse]
+    title: Optional[str]
+    description: Optional[str]
+    user_id: Optional[UUID]
+    likes_count: Optional[int]
+    dislikes_count: Optional[int]
+    likes: Optional[list[LikesResponse]]
+    dislikes: Optional[list[DislikesResponse]]
 
     class Config:
         orm_mode = True
+
+
+class PostsPageResponse(BaseModel):
+    items: list[PostsResponse]
+    next_cursor: Optional[str]
+
+
+class PostsImportErrorResponse(BaseModel):
+    line: Optional[int]
+    error: str
+
+
+class PostsImportChunkResponse(BaseModel):
+    chunk: int
+    first_line: int
+    last_line: int
+    inserted: int
+    rejected: int
+    errors: list[PostsImportErrorResponse]
+
+
+class PostsImportResponse(BaseModel):
+    inserted: int
+    rejected: int
+    chunks: list[PostsImportChunkResponse]
+    omitted_chunks: int
+
+
+class PostsDeleteResponse(BaseModel):
+    deleted: int
@@ -0,0 +1,22 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.api.request_models.reactions import ReactionAction, ReactionType
+
+
+class ReactionStatus(str, Enum):
+    created = "created"
+    deleted = "deleted"
+    not_found = "not_found"
+    forbidden = "forbidden"
+
+
+class ReactionItemResponse(BaseModel):
+    post_id: UUID
+    reaction: ReactionType
+    action: ReactionAction
+    status: ReactionStatus
+    id: Optional[UUID]
@@ -2,3 +2,6 @@ from .posts import router as posts_router  # noqa
 from .users import router as users_router  # noqa
 from .dislikes import router as dislikes_router  # noqa
 from .likes import router as likes_router  # noqa
+from .reactions import router as reactions_router  # noqa
+from .service import router as service_router  # noqa
+from .metrics import router as metrics_router  # noqa
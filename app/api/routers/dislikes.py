@@ -3,10 +3,15 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic.schema import UUID
 
+from app.api.request_models.reactions import ReactionType
 from app.api.response_models.dislikes import DislikesResponse
-from app.core.db.models import User
+from app.api.response_models.reactions import ReactionStatus
+from app.api.serializers import FastJSONResponse, reaction_to_dict
+from app.core.db.models import Dislikes, User
 from app.core.db.user import current_user
+from app.core.settings import settings
 from app.crud.dislikes_crud import DislikesService, get_dislikes_service
+from app.crud.reactions_crud import ReactionsService, get_reactions_service
 
 
 STR_POST_ENTITY_NOT_EXIST = "Поста с таким ID не существует"
@@ -27,22 +32,23 @@ router = APIRouter()
 async def create_dislike(
     post_id: UUID,
     user: User = Depends(current_user),
-    dislikes_service: DislikesService = Depends(get_dislikes_service)
+    dislikes_service: DislikesService = Depends(get_dislikes_service),
+    reactions_service: ReactionsService = Depends(get_reactions_service)
 ):
     """Создать дизлайк."""
-    post = await dislikes_service.get_post_to_check(post_id)
-    if post is None:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
-    if post.user_id == user.id:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
-    like = await dislikes_service.get_like_to_check(post_id, user.id)
-    if like is not None:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
-    dislike = await dislikes_service.get_dislike(post_id, user.id)
-    if dislike is not None:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+    if settings.REACTIONS_WRITE_BEHIND:
+        status, dislike_id = await reactions_service.queue_create(ReactionType.dislike, post_id, user.id)
+        if status is ReactionStatus.not_found:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
+        if status is ReactionStatus.forbidden:
+            raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+        return FastJSONResponse(reaction_to_dict(Dislikes(id=dislike_id, post_id=post_id, user_id=user.id)))
     new_dislike = await dislikes_service.create_dislike(post_id, user.id)
-    return new_dislike
+    if new_dislike is None:
+        if await dislikes_service.get_post_to_check(post_id) is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+    return FastJSONResponse(reaction_to_dict(new_dislike))
 
 
 @router.delete(
@@ -54,9 +60,17 @@ async def create_dislike(
 async def delete_dislike(
     dislike_id: UUID,
     user: User = Depends(current_user),
-    dislikes_service: DislikesService = Depends(get_dislikes_service)
+    dislikes_service: DislikesService = Depends(get_dislikes_service),
+    reactions_service: ReactionsService = Depends(get_reactions_service)
 ):
     """Удалить дизлайк."""
+    if settings.REACTIONS_WRITE_BEHIND:
+        status = await reactions_service.queue_delete(ReactionType.dislike, dislike_id, user.id)
+        if status is ReactionStatus.not_found:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_LIKE_ENTITY_NOT_EXIST)
+        if status is ReactionStatus.forbidden:
+            raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+        return dislike_id
     dislike = await dislikes_service.get_dislike_by_id(dislike_id)
     if dislike is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_LIKE_ENTITY_NOT_EXIST)
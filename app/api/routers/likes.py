@@ -3,10 +3,15 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic.schema import UUID
 
+from app.api.request_models.reactions import ReactionType
 from app.api.response_models.likes import LikesResponse
-from app.core.db.models import User
+from app.api.response_models.reactions import ReactionStatus
+from app.api.serializers import FastJSONResponse, reaction_to_dict
+from app.core.db.models import Likes, User
 from app.core.db.user import current_user
+from app.core.settings import settings
 from app.crud.likes_crud import LikesService, get_likes_service
+from app.crud.reactions_crud import ReactionsService, get_reactions_service
 
 
 STR_POST_ENTITY_NOT_EXIST = "Поста с таким ID не существует"
@@ -27,22 +32,23 @@ router = APIRouter()
 async def create_like(
     post_id: UUID,
     user: User = Depends(current_user),
-    likes_service: LikesService = Depends(get_likes_service)
+    likes_service: LikesService = Depends(get_likes_service),
+    reactions_service: ReactionsService = Depends(get_reactions_service)
 ):
     """Создать лайк."""
-    post = await likes_service.get_post_to_check(post_id)
-    if post is None:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
-    if post.user_id == user.id:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
-    dislike = await likes_service.get_dislike_to_check(post_id, user.id)
-    if dislike is not None:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
-    like = await likes_service.get_like(post_id, user.id)
-    if like is not None:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+    if settings.REACTIONS_WRITE_BEHIND:
+        status, like_id = await reactions_service.queue_create(ReactionType.like, post_id, user.id)
+        if status is ReactionStatus.not_found:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
+        if status is ReactionStatus.forbidden:
+            raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+        return FastJSONResponse(reaction_to_dict(Likes(id=like_id, post_id=post_id, user_id=user.id)))
     new_like = await likes_service.create_like(post_id, user.id)
-    return new_like
+    if new_like is None:
+        if await likes_service.get_post_to_check(post_id) is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_POST_ENTITY_NOT_EXIST)
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+    return FastJSONResponse(reaction_to_dict(new_like))
 
 
 @router.delete(
@@ -54,9 +60,17 @@ async def create_like(
 async def delete_like(
     like_id: UUID,
     user: User = Depends(current_user),
-    likes_service: LikesService = Depends(get_likes_service)
+    likes_service: LikesService = Depends(get_likes_service),
+    reactions_service: ReactionsService = Depends(get_reactions_service)
 ):
     """Удалить лайк."""
+    if settings.REACTIONS_WRITE_BEHIND:
+        status = await reactions_service.queue_delete(ReactionType.like, like_id, user.id)
+        if status is ReactionStatus.not_found:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_LIKE_ENTITY_NOT_EXIST)
+        if status is ReactionStatus.forbidden:
+            raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
+        return like_id
     like = await likes_service.get_like_by_id(like_id)
     if like is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_LIKE_ENTITY_NOT_EXIST)
@@ -0,0 +1,62 @@
+import secrets
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import get_posts_cache, get_posts_flight
+from app.core.db.db import get_pool_stats
+from app.core.live import get_live_counters
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.crud.reactions_buffer import get_reactions_buffer
+
+router = APIRouter()
+
+
+async def check_metrics_token(request: Request) -> None:
+    """Пускать к /metrics только с Authorization: Bearer METRICS_TOKEN.
+
+    Без METRICS_TOKEN эндпоинт выключен: метрики раскрывают трафик по
+    маршрутам и состояние пулов БД.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not secrets.compare_digest(request.headers.get("authorization", "").encode(), expected.encode()):
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(check_metrics_token)])
+async def prometheus_metrics():
+    """Метрики процесса в формате Prometheus."""
+    posts_cache = get_posts_cache()
+    posts_flight = get_posts_flight()
+    live_counters = get_live_counters()
+    counters = {
+        "posts_cache_hits_total": posts_cache.hits,
+        "posts_cache_misses_total": posts_cache.misses,
+        "posts_cache_rejected_total": posts_cache.rejected,
+        "posts_load_calls_total": posts_flight.calls,
+        "posts_load_coalesced_total": posts_flight.coalesced,
+        "live_deltas_received_total": live_counters.received,
+        "live_updates_dispatched_total": live_counters.dispatched,
+    }
+    gauges = {
+        "posts_load_in_flight": posts_flight.in_flight,
+        "live_connections": live_counters.connections,
+        "live_posts_subscribed": len(live_counters.subscriptions),
+    }
+    if settings.REACTIONS_WRITE_BEHIND:
+        reactions_buffer = get_reactions_buffer()
+        gauges["reactions_buffer_queued"] = reactions_buffer.queued
+        counters.update(
+            reactions_buffer_flushed_total=reactions_buffer.flushed,
+            reactions_buffer_dropped_total=reactions_buffer.dropped,
+            reactions_buffer_retried_total=reactions_buffer.retried,
+        )
+    gauges.update(
+        (f"db_pool_{name}", value) for name, value in get_pool_stats().items()
+        if isinstance(value, int)
+    )
+    return PlainTextResponse(metrics.render(gauges, counters), media_type="text/plain; version=0.0.4")
@@ -1,35 +1,336 @@
+import time
 from http import HTTPStatus
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic.schema import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.conditional import (
+    is_conditional, is_not_modified, not_modified, page_etag, post_etag, validator_headers
+)
+from app.api.fields import POST_INCLUDES, PostFields, page_fields, post_fields
 from app.api.request_models.posts import PostsCreateAndUpdateRequest
-from app.api.response_models.posts import PostsResponse
-from app.core.db.models import User
+from app.api.response_models.posts import (
+    PostsDeleteResponse, PostsImportResponse, PostsResponse, PostsPageResponse
+)
+from app.api.serializers import (
+    FastJSONResponse, dumps, post_fields_to_dict, post_to_dict, posts_page_to_dict, rows_to_ndjson,
+    select_fields
+)
+from app.core.cache import CachedPost, PostsCache, get_posts_cache, get_posts_flight
+from app.core.db.db import get_session
+from app.core.db.models import Posts, User
 from app.core.db.user import current_user
-from app.crud.posts_crud import PostsService, get_posts_service
+from app.core.live import Subscription, get_live_counters
+from app.core.metrics import measure
+from app.core.pagination import (
+    decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+)
+from app.core.settings import settings
+from app.crud.posts_crud import PostsService, get_posts_read_service, get_posts_service, posts_columns
+from app.crud.posts_import import IMPORT_MAX_CHUNKS, ImportFormat, PostsImporter
+from app.crud.rankings_crud import RankingsService, get_rankings_service
 
 
 STR_ENTITY_NOT_EXIST = "Поста с таким ID не существует"
 STR_FORBIDDEN = "Нету прав для изменения поста"
+STR_INVALID_CURSOR = "Некорректный курсор"
+SEARCH_MAX_LENGTH = 200
+
+PAGE_DEFAULT_LIMIT = 20
+PAGE_MAX_LIMIT = 100
+EXPORT_DEFAULT_CHUNK = 1000
+EXPORT_MAX_CHUNK = 10000
+LIVE_MAX_POSTS = 100
 
 router = APIRouter()
 
 
+def render_post(post: Posts) -> bytes:
+    """Сериализовать пост так же, как это делает response_model."""
+    return dumps(post_to_dict(post))
+
+
+async def load_post(
+    post_id: UUID, posts_service: PostsService, posts_cache: PostsCache
+) -> Optional[CachedPost]:
+    """Загрузить пост из БД, сериализовать и положить в кеш."""
+    loaded_at = time.time()
+    post = await posts_service.get_post(post_id)
+    if post is None:
+        return None
+    with measure("render"):
+        cached = CachedPost(post.version, post.updated_at, render_post(post))
+    await posts_cache.set(post_id, cached, loaded_at)
+    return cached
+
+
+async def render_page(
+    posts: list, next_cursor: Optional[str], fields: PostFields, posts_service: PostsService
+) -> dict:
+    """PostsPageResponse с полями fields, списки реакций загружаются одним запросом на список."""
+    reactions = await posts_service.get_posts_reactions([post.id for post in posts], fields.include)
+    return posts_page_to_dict(posts, next_cursor, fields.fields, reactions)
+
+
+async def load_post_fields(
+    post_id: UUID, fields: PostFields, posts_service: PostsService
+) -> Optional[CachedPost]:
+    """Загрузить из БД только поля fields поста, без кеша."""
+    post = await posts_service.get_post_fields(post_id, posts_columns(fields.fields))
+    if post is None:
+        return None
+    reactions = await posts_service.get_posts_reactions([post_id], fields.include)
+    return CachedPost(post.version, post.updated_at, dumps(post_fields_to_dict(post, fields.fields, reactions)))
+
+
 @router.get(
     "/",
-    response_model=list[PostsResponse],
+    response_model=PostsPageResponse,
     response_model_exclude_none=True,
     summary="Получить информацию о всех постах.",
-    response_description="Полная информация о всех постах.",
+    response_description="Страница постов и курсор следующей страницы.",
     dependencies=[Depends(current_user)],
 )
 async def get_all_posts(
-    posts_service: PostsService = Depends(get_posts_service)
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    with_reactions: bool = False,
+    fields: PostFields = Depends(page_fields),
+    posts_service: PostsService = Depends(get_posts_read_service)
+):
+    """
+    Информация о всех постах, от новых к старым.
+      - **cursor** - значение next_cursor из предыдущего ответа;
+      - **limit** - размер страницы;
+      - **fields** - вернуть только эти поля постов, по умолчанию все;
+      - **include** - добавить списки likes и/или dislikes;
+      - **with_reactions** - то же, что include=likes,dislikes.
+
+    На последней странице next_cursor отсутствует. Ответ содержит ETag,
+    при совпадении If-None-Match возвращается 304 без тела.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=STR_INVALID_CURSOR)
+    if with_reactions:
+        fields = fields._replace(include=POST_INCLUDES)
+    # Last-Modified у страницы не выставляется: после удаления поста
+    # максимальный updated_at может не измениться.
+    if is_conditional(request):
+        versions = await posts_service.get_all_post_versions(limit + 1, after)
+        headers = validator_headers(page_etag(versions, fields.variant()))
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+    all_post = await posts_service.get_all_post(limit + 1, after, posts_columns(fields.fields))
+    headers = validator_headers(page_etag(all_post, fields.variant()))
+    next_cursor = None
+    if len(all_post) > limit:
+        all_post = all_post[:limit]
+        next_cursor = encode_cursor(all_post[-1].created_at, all_post[-1].id)
+    return FastJSONResponse(
+        await render_page(all_post, next_cursor, fields, posts_service), headers=headers
+    )
+
+
+@router.get(
+    "/top",
+    response_model=PostsPageResponse,
+    response_model_exclude_none=True,
+    summary="Получить популярные посты.",
+    response_description="Посты с наибольшим рейтингом.",
+    dependencies=[Depends(current_user)],
+)
+async def get_top_posts(
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    fields: PostFields = Depends(page_fields),
+    rankings_service: RankingsService = Depends(get_rankings_service),
+    posts_service: PostsService = Depends(get_posts_read_service)
+):
+    """
+    Популярные посты: перевес лайков над дизлайками с затуханием по возрасту.
+      - **limit** - сколько постов вернуть;
+      - **fields** - вернуть только эти поля постов, по умолчанию все;
+      - **include** - добавить списки likes и/или dislikes.
+
+    Рейтинг обновляется в фоне, раз в TRENDING_REFRESH_INTERVAL секунд.
+    """
+    top_posts = await rankings_service.get_top_posts(limit, posts_columns(fields.fields))
+    return FastJSONResponse(await render_page(top_posts, None, fields, posts_service))
+
+
+@router.get(
+    "/author/{user_id}",
+    response_model=PostsPageResponse,
+    response_model_exclude_none=True,
+    summary="Получить посты автора.",
+    response_description="Страница постов автора и курсор следующей страницы.",
+    dependencies=[Depends(current_user)],
+)
+async def get_author_posts(
+    user_id: UUID,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    fields: PostFields = Depends(page_fields),
+    posts_service: PostsService = Depends(get_posts_read_service)
+):
+    """
+    Посты пользователя user_id со счетчиками реакций, от новых к старым.
+      - **cursor** - значение next_cursor из предыдущего ответа;
+      - **limit** - размер страницы;
+      - **fields** - вернуть только эти поля постов, по умолчанию все;
+      - **include** - добавить списки likes и/или dislikes.
+
+    На последней странице next_cursor отсутствует. Ответ содержит ETag,
+    при совпадении If-None-Match возвращается 304 без тела.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=STR_INVALID_CURSOR)
+    if is_conditional(request):
+        versions = await posts_service.get_all_post_versions(limit + 1, after, user_id)
+        headers = validator_headers(page_etag(versions, fields.variant()))
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+    author_posts = await posts_service.get_author_posts(
+        user_id, limit + 1, after, posts_columns(fields.fields)
+    )
+    headers = validator_headers(page_etag(author_posts, fields.variant()))
+    next_cursor = None
+    if len(author_posts) > limit:
+        author_posts = author_posts[:limit]
+        next_cursor = encode_cursor(author_posts[-1].created_at, author_posts[-1].id)
+    return FastJSONResponse(
+        await render_page(author_posts, next_cursor, fields, posts_service), headers=headers
+    )
+
+
+@router.get(
+    "/search",
+    response_model=PostsPageResponse,
+    response_model_exclude_none=True,
+    summary="Искать посты.",
+    response_description="Страница найденных постов и курсор следующей страницы.",
+    dependencies=[Depends(current_user)],
+)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_LENGTH),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    fields: PostFields = Depends(page_fields),
+    posts_service: PostsService = Depends(get_posts_read_service)
 ):
-    """Информация о всех постах."""
-    all_post = await posts_service.get_all_post()
-    return all_post
+    """
+    Полнотекстовый поиск по заголовку и описанию, от самых релевантных.
+      - **q** - искомые слова, пост должен содержать все;
+      - **cursor** - значение next_cursor из предыдущего ответа;
+      - **limit** - размер страницы;
+      - **fields** - вернуть только эти поля постов, по умолчанию все;
+      - **include** - добавить списки likes и/или dislikes.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_rank_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=STR_INVALID_CURSOR)
+    if not q.split():
+        return FastJSONResponse(posts_page_to_dict([], None))
+    found = await posts_service.search_posts(q, limit + 1, after, posts_columns(fields.fields))
+    next_cursor = None
+    if len(found) > limit:
+        found = found[:limit]
+        next_cursor = encode_rank_cursor(found[-1].rank, found[-1].id)
+    return FastJSONResponse(await render_page(found, next_cursor, fields, posts_service))
+
+
+async def render_ndjson(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Превратить пачки строк постов в NDJSON, по одному куску на пачку."""
+    async for rows in chunks:
+        yield rows_to_ndjson(rows)
+
+
+@router.get(
+    "/export",
+    summary="Выгрузить все посты в NDJSON.",
+    response_description="Поток постов со счетчиками реакций, по одному JSON на строку.",
+    dependencies=[Depends(current_user)],
+)
+async def export_posts(
+    after: Optional[UUID] = None,
+    chunk_size: int = Query(EXPORT_DEFAULT_CHUNK, ge=1, le=EXPORT_MAX_CHUNK),
+    posts_service: PostsService = Depends(get_posts_read_service)
+):
+    """
+    Потоковая выгрузка постов в порядке id через серверный курсор.
+      - **after** - id последнего полученного поста, чтобы продолжить
+        прерванную выгрузку;
+      - **chunk_size** - сколько строк читать из БД за раз.
+    """
+    return StreamingResponse(
+        render_ndjson(posts_service.stream_posts(after, chunk_size)),
+        media_type="application/x-ndjson",
+    )
+
+
+async def render_live_events(subscription: Subscription) -> AsyncIterator[bytes]:
+    """Server-Sent Events с приращениями счетчиков, пока клиент не отключится."""
+    live_counters = get_live_counters()
+    try:
+        yield b": connected\n\n"
+        while True:
+            deltas = await subscription.get(settings.LIVE_KEEPALIVE)
+            if not deltas:
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: counts\ndata: " + dumps([
+                {"post_id": str(post_id), "likes": delta.likes, "dislikes": delta.dislikes}
+                for post_id, delta in deltas.items()
+            ]) + b"\n\n"
+    finally:
+        live_counters.unsubscribe(subscription)
+
+
+@router.get(
+    "/live",
+    summary="Подписаться на изменения счетчиков реакций.",
+    response_description="Поток Server-Sent Events с приращениями likes_count и dislikes_count.",
+    dependencies=[Depends(current_user)],
+)
+async def live_counts(
+    post_id: list[UUID] = Query(...),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Изменения счетчиков постов в реальном времени вместо опроса GET /posts/{post_id}.
+      - **post_id** - id постов, можно повторять, не больше 100.
+
+    Событие counts содержит список {post_id, likes, dislikes} с приращениями
+    счетчиков с прошлого события, не чаще LIVE_UPDATES_PER_SECOND раз в секунду.
+    Подпишитесь до запроса исходных значений, чтобы не пропустить изменения.
+    """
+    if len(post_id) > LIVE_MAX_POSTS:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=f"Не больше {LIVE_MAX_POSTS} постов"
+        )
+    # Сессия проверки токена живет до конца ответа: отдаем соединение в пул сразу.
+    await session.close()
+    subscription = get_live_counters().subscribe(post_id)
+    return StreamingResponse(
+        render_live_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get(
@@ -42,13 +343,44 @@ async def get_all_posts(
 )
 async def get_post(
     post_id: UUID,
-    posts_service: PostsService = Depends(get_posts_service)
+    request: Request,
+    fields: PostFields = Depends(post_fields),
+    posts_service: PostsService = Depends(get_posts_read_service),
+    posts_cache: PostsCache = Depends(get_posts_cache)
 ):
-    """Информация о посте."""
-    post = await posts_service.get_post(post_id)
-    if post is None:
+    """
+    Информация о посте.
+      - **fields** - вернуть только эти поля поста, по умолчанию все;
+      - **include** - какие списки реакций вернуть, по умолчанию
+        likes,dislikes; пустое значение - только счетчики.
+
+    Ответ содержит ETag и Last-Modified, при совпадении If-None-Match
+    или If-Modified-Since возвращается 304 без тела.
+    """
+    variant = fields.variant(POST_INCLUDES)
+    if is_conditional(request):
+        version = await posts_service.get_post_version(post_id)
+        if version is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_ENTITY_NOT_EXIST)
+        headers = validator_headers(post_etag(version.version, variant), version.updated_at)
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+    cached = await posts_cache.get(post_id)
+    if cached is not None and variant:
+        cached = cached._replace(payload=select_fields(cached.payload, fields.fields + fields.include))
+    elif cached is None and variant:
+        # В кеше только полные посты: узкий запрос читает из БД одни свои колонки.
+        cached = await load_post_fields(post_id, fields, posts_service)
+    elif cached is None:
+        # Одновременные промахи по этому посту ждут одну загрузку.
+        cached = await get_posts_flight().do(
+            post_id, lambda: load_post(post_id, posts_service, posts_cache)
+        )
+    if cached is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_ENTITY_NOT_EXIST)
-    return post
+    return FastJSONResponse(
+        cached.payload, headers=validator_headers(post_etag(cached.version, variant), cached.updated_at)
+    )
 
 
 @router.post(
@@ -70,7 +402,48 @@ async def create_post(
       - **description** - описание поста.
     """
     new_post = await posts_service.create_post(post_data, user.id)
-    return new_post
+    return FastJSONResponse(post_to_dict(new_post))
+
+
+@router.post(
+    "/import",
+    response_model=PostsImportResponse,
+    summary="Импортировать посты из NDJSON или CSV.",
+    response_description="Число вставленных и отклоненных строк, ошибки по пачкам.",
+    dependencies=[Depends(current_user)],
+)
+async def import_posts(
+    request: Request,
+    import_format: Optional[ImportFormat] = Query(None, alias="format"),
+    user: User = Depends(current_user),
+    posts_service: PostsService = Depends(get_posts_service)
+):
+    """
+    Создать посты текущего пользователя из тела запроса.
+      - **format** - ndjson (по объекту на строку) или csv (с заголовком
+        title,description); по умолчанию определяется по Content-Type.
+
+    Тело читается потоком, строки проверяются и записываются пачками,
+    каждая пачка в своей транзакции. В chunks попадают только первые 20 пачек
+    с ошибками, не больше 100 ошибок на пачку, остальные пачки с ошибками
+    считаются в omitted_chunks.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = ImportFormat.csv if content_type.startswith("text/csv") else ImportFormat.ndjson
+    inserted, rejected, chunks, omitted_chunks = 0, 0, [], 0
+    async for report in PostsImporter(posts_service).run(request.stream(), import_format, user.id):
+        inserted += report.inserted
+        rejected += report.rejected
+        if not report.errors:
+            continue
+        if len(chunks) < IMPORT_MAX_CHUNKS:
+            chunks.append(report._asdict())
+        else:
+            omitted_chunks += 1
+    return FastJSONResponse(dict(
+        inserted=inserted, rejected=rejected, chunks=chunks, omitted_chunks=omitted_chunks
+    ))
 
 
 @router.patch(
@@ -91,13 +464,34 @@ async def update_post(
     - **title**: название поста
     - **description**: описание поста
     """
-    post = await posts_service.get_post(post_id)
-    if post is None:
+    owner_id = await posts_service.get_post_owner(post_id)
+    if owner_id is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_ENTITY_NOT_EXIST)
-    if post.user_id != user.id:
+    if owner_id != user.id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
     post = await posts_service.update_post(post_id, post_data)
-    return post
+    return FastJSONResponse(post_to_dict(post))
+
+
+@router.delete(
+    "/",
+    response_model=PostsDeleteResponse,
+    summary="Удалить все свои посты.",
+    response_description="Число удаленных постов.",
+    dependencies=[Depends(current_user)],
+)
+async def delete_user_posts(
+    user: User = Depends(current_user),
+    posts_service: PostsService = Depends(get_posts_service)
+):
+    """
+    Удалить все посты текущего пользователя вместе с их реакциями.
+
+    Посты удаляются пачками, каждая в своей транзакции: при ошибке
+    посты уже удаленных пачек не восстанавливаются.
+    """
+    deleted = await posts_service.delete_user_posts(user.id)
+    return FastJSONResponse(dict(deleted=deleted))
 
 
 @router.delete(
@@ -112,10 +506,10 @@ async def delete_post(
     posts_service: PostsService = Depends(get_posts_service)
 ):
     """Удалить пост."""
-    post = await posts_service.get_post(post_id)
-    if post is None:
+    owner_id = await posts_service.get_post_owner(post_id)
+    if owner_id is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=STR_ENTITY_NOT_EXIST)
-    if post.user_id != user.id:
+    if owner_id != user.id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=STR_FORBIDDEN)
     await posts_service.delete_post(post_id)
     return post_id
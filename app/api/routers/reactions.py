@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+
+from app.api.request_models.reactions import ReactionsBulkRequest
+from app.api.response_models.reactions import ReactionItemResponse
+from app.core.db.models import User
+from app.core.db.user import current_user
+from app.core.settings import settings
+from app.crud.reactions_crud import ReactionsService, get_reactions_service
+
+router = APIRouter()
+
+
+@router.post(
+    "/bulk",
+    response_model=list[ReactionItemResponse],
+    response_model_exclude_none=True,
+    summary="Применить пакет лайков и дизлайков.",
+    response_description="Результат по каждому элементу пакета.",
+    dependencies=[Depends(current_user)],
+)
+async def bulk_reactions(
+    reactions_data: ReactionsBulkRequest,
+    user: User = Depends(current_user),
+    reactions_service: ReactionsService = Depends(get_reactions_service)
+):
+    """
+    Создать или удалить реакции к нескольким постам одной транзакцией.
+      - **post_id** - ID поста;
+      - **reaction** - like или dislike;
+      - **action** - create или delete.
+
+    Элементы применяются по порядку, status для каждого: created, deleted,
+    not_found или forbidden. При REACTIONS_WRITE_BEHIND пакет ставится
+    в буфер отложенной записи вместе с одиночными лайками и дизлайками.
+    """
+    if settings.REACTIONS_WRITE_BEHIND:
+        return await reactions_service.queue_apply(reactions_data.items, user.id)
+    return await reactions_service.apply(reactions_data.items, user.id)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.core.cache import PostsCache, get_posts_cache, get_posts_flight
+from app.core.db.db import get_pool_stats
+from app.core.db.replicas import get_replica_set
+from app.core.db.user import current_superuser
+
+router = APIRouter()
+
+
+@router.get(
+    "/cache",
+    summary="Статистика кеша постов.",
+    response_description="Количество попаданий и промахов кеша.",
+    dependencies=[Depends(current_superuser)],
+)
+async def cache_stats(
+    posts_cache: PostsCache = Depends(get_posts_cache)
+):
+    """Попадания и промахи кеша постов в этом процессе
+    и сколько загрузок постов объединено с уже идущими."""
+    return {"posts": posts_cache.stats(), "posts_load": get_posts_flight().stats()}
+
+
+@router.get(
+    "/pool",
+    summary="Использование пула соединений с БД.",
+    response_description="Размер пула, занятые и свободные соединения.",
+    dependencies=[Depends(current_superuser)],
+)
+async def pool_stats():
+    """Состояние пула соединений этого процесса и доступность реплик."""
+    replica_set = get_replica_set()
+    if replica_set.replicas:
+        return {**get_pool_stats(), "replicas": replica_set.stats()}
+    return get_pool_stats()
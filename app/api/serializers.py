@@ -0,0 +1,123 @@
+"""Быстрая сериализация ответов без повторной валидации pydantic.
+
+Строки из БД уже соответствуют response_model, поэтому они переводятся в dict
+напрямую и кодируются orjson, если он установлен. Результат побайтно совпадает
+с тем, что FastAPI получил бы через response_model и JSONResponse,
+включая response_model_exclude_none.
+"""
+import json
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from fastapi.responses import Response
+
+from app.api.fields import POST_FIELDS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(content: Any) -> bytes:
+    """Закодировать JSON так же, как JSONResponse."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON-ответ через dumps. Готовые bytes отдаются как есть."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def reaction_to_dict(reaction) -> dict:
+    """LikesResponse/DislikesResponse."""
+    return {
+        "id": str(reaction.id),
+        "post_id": str(reaction.post_id),
+        "user_id": str(reaction.user_id),
+    }
+
+
+def post_to_dict(post, with_reactions: bool = True) -> dict:
+    """PostsResponse. Без with_reactions списки реакций не выводятся."""
+    data = {
+        "id": str(post.id),
+        "title": post.title,
+        "description": post.description,
+        "user_id": str(post.user_id),
+        "likes_count": post.likes_count,
+        "dislikes_count": post.dislikes_count,
+    }
+    if with_reactions:
+        data["likes"] = [reaction_to_dict(like) for like in post.likes]
+        data["dislikes"] = [reaction_to_dict(dislike) for dislike in post.dislikes]
+    return data
+
+
+UUID_FIELDS = frozenset(("id", "user_id"))
+
+
+def select_fields(payload: bytes, names: Iterable[str]) -> bytes:
+    """Оставить в сериализованном PostsResponse только ключи names, в прежнем порядке."""
+    names = frozenset(names)
+    return dumps({key: value for key, value in loads(payload).items() if key in names})
+
+
+def post_fields_to_dict(post, fields: Iterable[str], reactions: Optional[dict] = None) -> dict:
+    """PostsResponse только с полями fields.
+
+    reactions - {"likes": {post_id: [строки]}, ...}, см. PostsService.get_posts_reactions,
+    списки выводятся в порядке ключей.
+    """
+    data = {}
+    for name in fields:
+        value = getattr(post, name)
+        data[name] = str(value) if name in UUID_FIELDS else value
+    for name, by_post in (reactions or {}).items():
+        data[name] = [reaction_to_dict(reaction) for reaction in by_post.get(post.id, ())]
+    return data
+
+
+def posts_page_to_dict(
+    posts: Iterable, next_cursor: Optional[str], fields: Iterable[str] = POST_FIELDS,
+    reactions: Optional[dict] = None,
+) -> dict:
+    """PostsPageResponse из строк с колонками fields."""
+    data = {"items": [post_fields_to_dict(post, fields, reactions) for post in posts]}
+    if next_cursor is not None:
+        data["next_cursor"] = next_cursor
+    return data
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def rows_to_ndjson(rows: Iterable) -> bytes:
+    """Строки результата запроса в NDJSON, по одному объекту на строку."""
+    if orjson is not None:
+        return b"".join(
+            orjson.dumps(dict(row._mapping), default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+    return "".join(
+        json.dumps(dict(row._mapping), ensure_ascii=False, separators=(",", ":"), default=_json_default) + "\n"
+        for row in rows
+    ).encode()
@@ -1,15 +1,54 @@
 import uvicorn
 from fastapi import FastAPI
 
-from app.api.routers import users_router, posts_router, likes_router, dislikes_router
+from app.api.routers import (
+    users_router, posts_router, likes_router, dislikes_router, reactions_router, service_router,
+    metrics_router
+)
+from app.core.db.db import get_engine
+from app.core.db.replicas import ReadYourWritesMiddleware, get_replica_set
+from app.core.live import get_live_counters
+from app.core.metrics import MetricsMiddleware
+from app.core.settings import settings
+from app.crud.rankings_refresher import get_rankings_refresher
+from app.crud.reactions_buffer import get_reactions_buffer
+from app.warmup import warm_up
+
+
+async def dispose_engines() -> None:
+    await get_engine().dispose()
+    for replica in get_replica_set().replicas:
+        await replica.engine.dispose()
 
 
 def create_app() -> FastAPI:
+    """Создать приложение.
+
+    Настройки и движки БД создаются здесь, а не при импорте модулей.
+    """
     app = FastAPI()
+    get_engine()
+    app.add_middleware(MetricsMiddleware)
+    if get_replica_set().replicas and settings.DB_READ_YOUR_WRITES > 0:
+        app.add_middleware(ReadYourWritesMiddleware, max_age=settings.DB_READ_YOUR_WRITES)
     app.include_router(users_router)
     app.include_router(posts_router, prefix="/posts", tags=["Posts"])
     app.include_router(likes_router, prefix="/likes", tags=["Likes"])
     app.include_router(dislikes_router, prefix="/dislikes", tags=["Dislikes"])
+    app.include_router(reactions_router, prefix="/reactions", tags=["Reactions"])
+    app.include_router(service_router, prefix="/service", tags=["Service"])
+    app.include_router(metrics_router)
+    if settings.DB_WARMUP:
+        app.add_event_handler("startup", warm_up)
+    app.add_event_handler("startup", get_live_counters().start)
+    app.add_event_handler("shutdown", get_live_counters().stop)
+    if settings.REACTIONS_WRITE_BEHIND:
+        app.add_event_handler("startup", get_reactions_buffer().start)
+        app.add_event_handler("shutdown", get_reactions_buffer().stop)
+    if settings.TRENDING_REFRESH_INTERVAL > 0:
+        app.add_event_handler("startup", get_rankings_refresher().start)
+        app.add_event_handler("shutdown", get_rankings_refresher().stop)
+    app.add_event_handler("shutdown", dispose_engines)
     return app
 
 
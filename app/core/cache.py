@@ -0,0 +1,239 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from pydantic.schema import UUID
+from pydantic.tools import lru_cache
+
+from app.core.settings import settings
+from app.core.singleflight import SingleFlight
+
+
+class TTLCache:
+    """Ограниченный по размеру LRU-кеш в памяти процесса с временем жизни записей."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(ABC):
+    """Хранилище сериализованных ответов."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def set_unless(self, key: str, value: bytes, reject: Callable[[Optional[bytes]], bool]) -> bool:
+        """Записать value, если reject(текущее значение) ложно.
+
+        Проверка и запись атомарны относительно других записей ключа.
+        Вернет True, если значение записано.
+        """
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Кеш в памяти процесса. У каждого воркера свой."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.cache = TTLCache(max_size, ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self.cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+    async def set_unless(self, key: str, value: bytes, reject: Callable[[Optional[bytes]], bool]) -> bool:
+        # Между проверкой и записью нет await: другие задачи цикла их не разделят.
+        if reject(self.cache.get(key)):
+            return False
+        self.cache.set(key, value)
+        return True
+
+
+class RedisCacheBackend(CacheBackend):
+    """Кеш в Redis, общий для всех воркеров.
+
+    client - любой объект с интерфейсом redis.asyncio.Redis (get, set с ex, delete,
+    pipeline с watch). set_unless - оптимистичная транзакция WATCH/MULTI.
+    Вытеснение LRU настраивается на сервере: maxmemory-policy allkeys-lru.
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "cache:") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def set_unless(self, key: str, value: bytes, reject: Callable[[Optional[bytes]], bool]) -> bool:
+        from redis.exceptions import WatchError
+
+        key = self.prefix + key
+        async with self.client.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            if reject(await pipe.get(key)):
+                return False
+            pipe.multi()
+            pipe.set(key, value, ex=self.ttl)
+            try:
+                await pipe.execute()
+            except WatchError:
+                # Ключ изменили между проверкой и записью, например инвалидировали.
+                return False
+        return True
+
+
+# Метка инвалидированной записи, за ней time.time() инвалидации.
+TOMBSTONE = b"invalidated "
+
+
+class CachedPost(NamedTuple):
+    """Сериализованный PostsResponse вместе с версией поста."""
+    version: int
+    updated_at: datetime
+    payload: bytes
+
+    def dump(self) -> bytes:
+        return f"{self.version} {self.updated_at.isoformat()}\n".encode() + self.payload
+
+    @classmethod
+    def load(cls, data: bytes) -> "CachedPost":
+        header, payload = data.split(b"\n", 1)
+        version, updated_at = header.decode().split(" ")
+        return cls(int(version), datetime.fromisoformat(updated_at), payload)
+
+
+class PostsCache:
+    """Read-through кеш сериализованных PostsResponse по id поста.
+
+    invalidate оставляет вместо записи метку со временем инвалидации. Загрузка,
+    начатая до нее или меньше чем через replica_lag секунд после (реплика могла
+    еще не получить запись), в кеш не попадает, иначе старая версия поста
+    прожила бы в нем до CACHE_TTL.
+    """
+
+    def __init__(self, backend: CacheBackend, replica_lag: float = 0) -> None:
+        self.backend = backend
+        self.replica_lag = replica_lag
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    @staticmethod
+    def key(post_id: UUID) -> str:
+        return f"post:{post_id}"
+
+    async def get(self, post_id: UUID) -> Optional[CachedPost]:
+        data = await self.backend.get(self.key(post_id))
+        if data is None or data.startswith(TOMBSTONE):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedPost.load(data)
+
+    async def set(self, post_id: UUID, post: CachedPost, loaded_at: Optional[float] = None) -> bool:
+        """Положить пост в кеш.
+
+        loaded_at - time.time() перед чтением поста из БД. Вернет False, если
+        пост с тех пор инвалидировали и он не закеширован.
+        """
+        if loaded_at is None:
+            await self.backend.set(self.key(post_id), post.dump())
+            return True
+
+        def invalidated(data: Optional[bytes]) -> bool:
+            if data is None or not data.startswith(TOMBSTONE):
+                return False
+            return float(data[len(TOMBSTONE):]) + self.replica_lag >= loaded_at
+
+        stored = await self.backend.set_unless(self.key(post_id), post.dump(), invalidated)
+        if not stored:
+            self.rejected += 1
+        return stored
+
+    async def invalidate(self, *post_ids: UUID) -> None:
+        tombstone = TOMBSTONE + repr(time.time()).encode()
+        for post_id in post_ids:
+            await self.backend.set(self.key(post_id), tombstone)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "rejected": self.rejected}
+
+
+def create_cache_backend() -> CacheBackend:
+    """Создать хранилище кеша по настройкам."""
+    if settings.CACHE_BACKEND == "redis":
+        import redis.asyncio as redis
+
+        return RedisCacheBackend(redis.from_url(settings.REDIS_URL), settings.CACHE_TTL)
+    return InMemoryCacheBackend(settings.CACHE_MAX_SIZE, settings.CACHE_TTL)
+
+
+@lru_cache()
+def get_posts_cache() -> PostsCache:
+    """Кеш постов. С репликами свежей считается загрузка не раньше чем через
+    DB_READ_YOUR_WRITES секунд после инвалидации."""
+    replica_lag = settings.DB_READ_YOUR_WRITES if settings.replica_urls else 0
+    return PostsCache(create_cache_backend(), replica_lag)
+
+
+@lru_cache()
+def get_posts_flight() -> SingleFlight:
+    """Одновременные промахи кеша по одному посту загружают его из БД один раз."""
+    return SingleFlight()
+
+
+@lru_cache()
+def get_users_cache() -> TTLCache:
+    """Кеш проверенных пользователей по subject токена, общий для запросов процесса."""
+    return TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL)
@@ -1,14 +1,88 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from typing import Optional
 
-from app.core.settings import settings
+from pydantic.tools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import QueuePool
 
-engine = create_async_engine(settings.database_url, future=True, echo=True)
+from app.core.metrics import InstrumentedQueuePool, instrument_engine
+from app.core.settings import Settings, settings
 
 
-async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
+def create_engine(
+    settings: Settings, url: Optional[str] = None, connect_timeout: Optional[float] = None
+) -> AsyncEngine:
+    """Создать движок БД с параметрами пула из настроек.
+
+    url - другая база с теми же параметрами пула, например реплика.
+    """
+    url = make_url(url or settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite допускает одного писателя: одно соединение на процесс
+        # вместо ошибок "database is locked" при конкурентных транзакциях.
+        engine = create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _enable_foreign_keys(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+        return engine
+    connect_args = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    if connect_timeout is not None:
+        connect_args["timeout"] = connect_timeout
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
     )
+
+
+@lru_cache()
+def get_engine() -> AsyncEngine:
+    """Движок основной базы, создается при первом обращении."""
+    engine = create_engine(settings)
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache()
+def get_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+
+
+def async_session() -> AsyncSession:
+    """Новая сессия основной базы."""
+    return get_sessionmaker()()
+
+
+def get_pool_stats() -> dict:
+    """Текущее использование пула соединений."""
+    pool = get_engine().pool
+    if not isinstance(pool, QueuePool):
+        return {"status": pool.status()}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
+async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, bindparam, column, select, text, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import FromClause
+
+
+def upsert_insert(session: AsyncSession, model):
+    """insert() диалекта сессии с поддержкой ON CONFLICT."""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def values_table(
+    session: AsyncSession, name: str, columns: list[Column], rows: list[tuple]
+) -> FromClause:
+    """Строки rows как таблица name с колонками columns, например для INSERT ... SELECT.
+
+    SQLite не поддерживает список колонок у псевдонима (AS name (a, b)):
+    там VALUES оборачивается в SELECT, переименовывающий column1..N.
+    """
+    if session.bind.dialect.name != "sqlite":
+        return values(*(column(col.name, col.type) for col in columns), name=name).data(rows)
+    terms, params = [], []
+    for row_number, row in enumerate(rows):
+        names = [f"{name}_{row_number}_{index}" for index in range(len(columns))]
+        terms.append("(" + ", ".join(f":{param}" for param in names) + ")")
+        params.extend(
+            bindparam(param, value, type_=col.type) for param, value, col in zip(names, row, columns)
+        )
+    raw = text("VALUES " + ", ".join(terms)).bindparams(*params).columns(
+        *(column(f"column{index + 1}", col.type) for index, col in enumerate(columns))
+    ).subquery(f"{name}_values")
+    return select(
+        *(raw.c[f"column{index + 1}"].label(col.name) for index, col in enumerate(columns))
+    ).subquery(name)
@@ -1,19 +1,21 @@
 import re
 import uuid
+from datetime import datetime
 
-from sqlalchemy import Column, String
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, UniqueConstraint, Uuid, func
 from sqlalchemy.ext.declarative import as_declarative
 from sqlalchemy.orm import validates, relationship
 from sqlalchemy.schema import ForeignKey
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
 
+from app.core.db.search import register_search_ddl
+
 
 @as_declarative()
 class Base:
     """Базовая модель."""
     id = Column(
-        UUID(as_uuid=True),
+        Uuid,
         primary_key=True,
         default=uuid.uuid4
     )
@@ -28,6 +30,10 @@ class User(SQLAlchemyBaseUserTable[uuid.uuid4], Base):
     surname = Column(String(length=100), nullable=False)
     email = Column(String(length=150), nullable=False, unique=True)
 
+    __table_args__ = (
+        Index("ix_users_lower_email", func.lower(email)),
+    )
+
     def __repr__(self):
         return f'<User: {self.id}, name: {self.name}, surname: {self.surname}>'
 
@@ -39,29 +45,55 @@ class Posts(Base):
     title = Column(String(length=50), nullable=False)
     description = Column(String(length=150), nullable=False)
     user_id = Column(
-        UUID(as_uuid=True), ForeignKey(User.id, ondelete="CASCADE"),
+        Uuid, ForeignKey(User.id, ondelete="CASCADE"),
         nullable=False
     )
-    likes = relationship("Likes", cascade='delete', lazy="selectin")
-    dislikes = relationship("Dislikes", cascade='delete', lazy="selectin")
+    created_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow,
+        server_default=func.now()
+    )
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow,
+        onupdate=datetime.utcnow, server_default=func.now()
+    )
+    # Реакции удаляет ON DELETE CASCADE в БД: при удалении поста ORM их не загружает.
+    likes = relationship("Likes", cascade='delete', passive_deletes=True, lazy="selectin")
+    dislikes = relationship("Dislikes", cascade='delete', passive_deletes=True, lazy="selectin")
+
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_posts_updated_at_id", "updated_at", "id"),
+    )
 
     def __repr__(self):
         return f"<Posts: {self.id}, title: {self.title}>"
 
 
+register_search_ddl(Posts.__table__)
+
+
 class Likes(Base):
     """Лайки."""
     __tablename__ = "likes"
 
     post_id = Column(
-        UUID(as_uuid=True), ForeignKey(Posts.id, ondelete="CASCADE"),
+        Uuid, ForeignKey(Posts.id, ondelete="CASCADE"),
         nullable=False
     )
     user_id = Column(
-        UUID(as_uuid=True), ForeignKey(User.id, ondelete="CASCADE"),
+        Uuid, ForeignKey(User.id, ondelete="CASCADE"),
         nullable=False
     )
 
+    __table_args__ = (
+        UniqueConstraint("post_id", "user_id", name="uq_likes_post_id_user_id"),
+        Index("ix_likes_user_id_post_id", "user_id", "post_id"),
+    )
+
     def __repr__(self):
         return f'<Likes: {self.id}, post_id: {self.post_id}, user_id: {self.user_id}>'
 
@@ -71,13 +103,37 @@ class Dislikes(Base):
     __tablename__ = "dislikes"
 
     post_id = Column(
-        UUID(as_uuid=True), ForeignKey(Posts.id, ondelete="CASCADE"),
+        Uuid, ForeignKey(Posts.id, ondelete="CASCADE"),
         nullable=False
     )
     user_id = Column(
-        UUID(as_uuid=True), ForeignKey(User.id, ondelete="CASCADE"),
+        Uuid, ForeignKey(User.id, ondelete="CASCADE"),
         nullable=False
     )
 
+    __table_args__ = (
+        UniqueConstraint("post_id", "user_id", name="uq_dislikes_post_id_user_id"),
+        Index("ix_dislikes_user_id_post_id", "user_id", "post_id"),
+    )
+
     def __repr__(self):
         return f'<Dislikes: {self.id}, post_id: {self.post_id}, user_id: {self.user_id}>'
+
+
+class PostRankings(Base):
+    """Рейтинг постов для ленты популярного, id совпадает с id поста."""
+    __tablename__ = "post_rankings"
+
+    id = Column(
+        Uuid, ForeignKey(Posts.id, ondelete="CASCADE"),
+        primary_key=True
+    )
+    score = Column(Float, nullable=False)
+    source_updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_post_rankings_score_id", "score", "id"),
+    )
+
+    def __repr__(self):
+        return f'<PostRankings: {self.id}, score: {self.score}>'
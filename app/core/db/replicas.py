@@ -0,0 +1,153 @@
+"""Чтение с реплик.
+
+Запросы на чтение по очереди раздаются репликам из DATABASE_REPLICA_URLS.
+Реплика, к которой не удалось подключиться, пропускается
+DB_REPLICA_RETRY_INTERVAL секунд, а запрос читает из основной базы.
+После успешного изменяющего запроса к постам или реакциям клиент получает
+cookie, и следующие
+DB_READ_YOUR_WRITES секунд его чтения тоже идут в основную базу, чтобы
+не увидеть данные до собственной записи из-за отставания реплики.
+Столько же секунд после инвалидации поста его загрузки не попадают в кеш
+постов: реплика могла еще не получить запись.
+"""
+import asyncio
+import itertools
+import time
+from typing import Optional
+
+from fastapi import Depends, Request
+from pydantic.tools import lru_cache
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.db.db import create_engine, get_session
+from app.core.metrics import instrument_engine
+from app.core.settings import settings
+
+READ_PRIMARY_COOKIE = "read_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Изменяющие запросы с этими префиксами меняют то, что читается с реплик.
+DATA_PREFIXES = ("/posts", "/likes", "/dislikes", "/reactions")
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.down_until = 0.0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """Реплики с раздачей по кругу и временным исключением недоступных."""
+
+    def __init__(self, engines: list[AsyncEngine], retry_interval: float) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self.retry_interval = retry_interval
+        self._next = itertools.cycle(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Следующая доступная реплика или None, если читать надо из основной базы."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            if replica.down_until <= now:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica) -> None:
+        replica.failures += 1
+        replica.down_until = time.monotonic() + self.retry_interval
+
+    async def open_session(self) -> Optional[AsyncSession]:
+        """Сессия на доступной реплике с уже полученным соединением.
+
+        Соединение берется сразу, чтобы недоступность реплики обнаружилась
+        до запросов обработчика и можно было перейти на следующую.
+        """
+        while (replica := self.choose()) is not None:
+            session = replica.sessionmaker()
+            try:
+                await session.connection()
+            except (OSError, DBAPIError, PoolTimeoutError, asyncio.TimeoutError):
+                await session.close()
+                self.mark_down(replica)
+                continue
+            return session
+        return None
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "host": replica.engine.url.host,
+                "healthy": replica.down_until <= now,
+                "failures": replica.failures,
+                "checked_out": replica.engine.pool.checkedout(),
+            }
+            for replica in self.replicas
+        ]
+
+
+@lru_cache()
+def get_replica_set() -> ReplicaSet:
+    """Реплики из настроек, движки создаются при первом обращении."""
+    engines = []
+    for url in settings.replica_urls:
+        engine = create_engine(settings, url, settings.DB_REPLICA_CONNECT_TIMEOUT)
+        instrument_engine(engine)
+        engines.append(engine)
+    return ReplicaSet(engines, settings.DB_REPLICA_RETRY_INTERVAL)
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_session)
+) -> AsyncSession:
+    """Сессия только для чтения: реплика или, если нельзя, сессия основной базы.
+
+    Сессия основной базы общая с get_session этого запроса и не занимает
+    соединение, пока к ней не обратились.
+    """
+    replica_set = get_replica_set()
+    if not replica_set.replicas or READ_PRIMARY_COOKIE in request.cookies:
+        yield session
+        return
+    replica_session = await replica_set.open_session()
+    if replica_session is None:
+        yield session
+        return
+    async with replica_session:
+        yield replica_session
+
+
+class ReadYourWritesMiddleware:
+    """ASGI-middleware: после успешного изменяющего запроса читать из основной базы.
+
+    Cookie ставится только для путей с префиксами prefixes: вход, регистрация
+    и прочие служебные запросы не переводят чтение на основную базу.
+    """
+
+    def __init__(self, app, max_age: int, prefixes: tuple[str, ...] = DATA_PREFIXES) -> None:
+        self.app = app
+        self.prefixes = prefixes
+        self.cookie = (
+            f"{READ_PRIMARY_COOKIE}=1; Max-Age={max_age}; Path=/; HttpOnly; SameSite=lax"
+        ).encode()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", self.cookie))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,72 @@
+"""Полнотекстовый поиск по заголовку и описанию постов.
+
+В Postgres это генерируемая колонка posts.search_vector с GIN-индексом,
+в SQLite - внешняя FTS5-таблица posts_fts, которую поддерживают триггеры.
+В рабочей базе их создает миграция, здесь DDL навешивается на create_all
+для локальных запусков и бенчмарков.
+"""
+from sqlalchemy import (
+    DDL, ColumnElement, Select, Table, column, event, func, literal, literal_column, table
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+SEARCH_CONFIG = "russian"
+
+POSTGRES_DDL = (
+    "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    f"to_tsvector('{SEARCH_CONFIG}', title || ' ' || description)) STORED",
+    "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+)
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "title, description, content='posts', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, description ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO posts_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); "
+    "END",
+)
+
+posts_fts = table("posts_fts", column("rowid"))
+
+
+def register_search_ddl(posts: Table) -> None:
+    """Создавать поисковый индекс вместе с таблицей постов."""
+    for statement in POSTGRES_DDL:
+        event.listen(posts, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_DDL:
+        event.listen(posts, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        posts, "before_drop", DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite")
+    )
+
+
+def sqlite_match_query(text: str) -> str:
+    """Запрос FTS5 из пользовательской строки: все слова, без операторов FTS5."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def apply_search(query: Select, dialect: str, text: str) -> tuple[Select, ColumnElement]:
+    """Ограничить запрос постами, подходящими под text.
+
+    Вернет запрос и выражение релевантности: чем больше, тем выше в выдаче.
+    """
+    if dialect == "sqlite":
+        rank = -func.bm25(literal_column("posts_fts"))
+        query = query.join(posts_fts, posts_fts.c.rowid == literal_column("posts.rowid")).where(
+            literal_column("posts_fts").match(sqlite_match_query(text))
+        )
+        return query, rank
+    search_vector = literal_column("posts.search_vector")
+    ts_query = func.plainto_tsquery(literal(SEARCH_CONFIG, REGCONFIG), text)
+    query = query.where(search_vector.op("@@")(ts_query))
+    return query, func.ts_rank_cd(search_vector, ts_query)
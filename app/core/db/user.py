@@ -1,16 +1,20 @@
-from typing import Union
+from typing import Any, Optional, Union
 import uuid
 
+import jwt
 from fastapi import Depends, Request
 from fastapi_users import (
-    BaseUserManager, FastAPIUsers, UUIDIDMixin, InvalidPasswordException
+    BaseUserManager, FastAPIUsers, UUIDIDMixin, InvalidPasswordException, exceptions
 )
 from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy, CookieTransport
 )
+from fastapi_users.jwt import decode_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_users_cache
+from app.core.metrics import measure
 from app.core.settings import settings
 from app.core.db.db import get_session
 from app.core.db.models import User
@@ -24,8 +28,51 @@ bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 cookie_transport = CookieTransport(cookie_max_age=3600)
 
 
+class CachedJWTStrategy(JWTStrategy):
+    """JWT-стратегия, которая не ходит в БД за пользователем на каждый запрос.
+
+    Проверенные пользователи хранят в get_users_cache() по subject токена
+    не дольше AUTH_CACHE_TTL секунд. Кеш у каждого воркера свой:
+    invalidate_user сбрасывает запись сразу только в текущем процессе.
+    """
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[User, uuid.uuid4]
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            user_id = data.get("user_id")
+            if user_id is None:
+                return None
+        except jwt.PyJWTError:
+            return None
+
+        users_cache = get_users_cache()
+        user = users_cache.get(user_id)
+        if user is None:
+            with measure("auth"):
+                try:
+                    user = await user_manager.get(user_manager.parse_id(user_id))
+                except (exceptions.UserNotExists, exceptions.InvalidID):
+                    return None
+            # Объект переживет сессию запроса: отвязываем его, чтобы rollback
+            # этой сессии не пометил атрибуты устаревшими.
+            user_manager.user_db.session.expunge(user)
+            users_cache.set(user_id, user)
+        return user
+
+
+def invalidate_user(user_id: Any) -> None:
+    """Убрать пользователя из кеша, например после деактивации."""
+    get_users_cache().delete(str(user_id))
+
+
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.SECRET, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=settings.SECRET, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -56,6 +103,18 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.uuid4]):
                 reason='Пароль не должен содержать адрес электронной почты'
             )
 
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional[Request] = None,
+    ) -> None:
+        invalidate_user(user.id)
+
+    async def delete(self, user: User) -> None:
+        await super().delete(user)
+        invalidate_user(user.id)
+
 
 async def get_enabled_backends(request: Request):
     if request.url.path == "/protected-route-only-jwt":
@@ -0,0 +1,247 @@
+"""Изменения счетчиков реакций в реальном времени.
+
+После коммита лайка или дизлайка сервис публикует приращения счетчиков
+в брокер. Брокер доставляет их LiveCounters каждого воркера, а тот раз
+в 1 / LIVE_UPDATES_PER_SECOND секунд раздает накопленное подписчикам:
+сколько бы реакций ни пришло, по посту уходит не больше
+LIVE_UPDATES_PER_SECOND обновлений в секунду. Приращения складываются,
+поэтому медленный подписчик не копит очередь, а получает одно суммарное
+обновление по каждому посту, когда освободится.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from pydantic.schema import UUID
+from pydantic.tools import lru_cache
+
+from app.core.settings import settings
+
+try:
+    import orjson
+    dumps, loads = orjson.dumps, orjson.loads
+except ImportError:  # pragma: no cover
+    import json
+
+    def dumps(content) -> bytes:
+        return json.dumps(content, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+
+
+class CountsDelta(NamedTuple):
+    """Приращение likes_count и dislikes_count поста."""
+    likes: int = 0
+    dislikes: int = 0
+
+    def __add__(self, other: "CountsDelta") -> "CountsDelta":
+        return CountsDelta(self.likes + other.likes, self.dislikes + other.dislikes)
+
+
+Deltas = dict[UUID, CountsDelta]
+
+
+def counts_deltas(
+    likes_added: Iterable[UUID] = (),
+    likes_removed: Iterable[UUID] = (),
+    dislikes_added: Iterable[UUID] = (),
+    dislikes_removed: Iterable[UUID] = (),
+) -> Deltas:
+    """Приращения по постам из post_id созданных и удаленных реакций.
+
+    Словари {post_id: id}, которые возвращают сервисы, считаются по ключам.
+    """
+    likes, dislikes = Counter(list(likes_added)), Counter(list(dislikes_added))
+    likes.subtract(list(likes_removed))
+    dislikes.subtract(list(dislikes_removed))
+    deltas = {
+        post_id: CountsDelta(likes[post_id], dislikes[post_id])
+        for post_id in likes.keys() | dislikes.keys()
+    }
+    return {post_id: delta for post_id, delta in deltas.items() if any(delta)}
+
+
+class CountsBroker(ABC):
+    """Доставка приращений всем воркерам."""
+
+    @abstractmethod
+    async def publish(self, deltas: Deltas) -> None:
+        ...
+
+    @abstractmethod
+    async def listen(self, receive: Callable[[Deltas], None]) -> None:
+        """Передавать в receive все опубликованные приращения, пока задачу не отменят."""
+
+
+class InMemoryCountsBroker(CountsBroker):
+    """Брокер внутри процесса: подписчики других воркеров изменений не видят."""
+
+    def __init__(self) -> None:
+        self._receive: Optional[Callable[[Deltas], None]] = None
+
+    async def publish(self, deltas: Deltas) -> None:
+        if self._receive is not None:
+            self._receive(deltas)
+
+    async def listen(self, receive: Callable[[Deltas], None]) -> None:
+        self._receive = receive
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._receive = None
+
+
+class RedisCountsBroker(CountsBroker):
+    """Брокер через Redis Pub/Sub, общий для всех воркеров.
+
+    client - любой объект с интерфейсом redis.asyncio.Redis (publish, pubsub).
+    Сообщение - JSON {post_id: [likes, dislikes]}.
+    """
+
+    def __init__(self, client, channel: str = "posts:counts") -> None:
+        self.client = client
+        self.channel = channel
+
+    async def publish(self, deltas: Deltas) -> None:
+        await self.client.publish(
+            self.channel, dumps({str(post_id): tuple(delta) for post_id, delta in deltas.items()})
+        )
+
+    async def listen(self, receive: Callable[[Deltas], None]) -> None:
+        async with self.client.pubsub() as pubsub:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                receive({
+                    UUID(post_id): CountsDelta(*delta)
+                    for post_id, delta in loads(message["data"]).items()
+                })
+
+
+class Subscription:
+    """Подписка одного соединения: накопленные, но еще не отправленные приращения."""
+
+    def __init__(self, post_ids: Iterable[UUID]) -> None:
+        self.post_ids = frozenset(post_ids)
+        self.pending: Deltas = {}
+        self._ready = asyncio.Event()
+
+    def push(self, post_id: UUID, delta: CountsDelta) -> None:
+        self.pending[post_id] = self.pending.get(post_id, CountsDelta()) + delta
+        self._ready.set()
+
+    async def get(self, timeout: float) -> Deltas:
+        """Дождаться приращений, не дольше timeout; пустой dict - по таймауту."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        pending, self.pending = self.pending, {}
+        return {post_id: delta for post_id, delta in pending.items() if any(delta)}
+
+
+class LiveCounters:
+    """Подписки соединений этого воркера и раздача им приращений из брокера."""
+
+    def __init__(self, broker: CountsBroker, updates_per_second: float) -> None:
+        self.broker = broker
+        self.interval = 1 / updates_per_second
+        self.subscriptions: defaultdict[UUID, set[Subscription]] = defaultdict(set)
+        self.connections = 0
+        self.received = 0
+        self.dispatched = 0
+        self._pending: Deltas = {}
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self.listen()),
+            asyncio.create_task(self.run()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def publish(self, deltas: Deltas) -> None:
+        """Опубликовать приращения после коммита. Ошибка брокера не ломает запрос."""
+        if not deltas:
+            return
+        try:
+            await self.broker.publish(deltas)
+        except Exception:
+            logger.exception("Не удалось опубликовать изменения счетчиков")
+
+    def receive(self, deltas: Deltas) -> None:
+        """Накопить приращения постов, на которые есть подписчики в этом воркере."""
+        for post_id, delta in deltas.items():
+            self.received += 1
+            if post_id in self.subscriptions:
+                self._pending[post_id] = self._pending.get(post_id, CountsDelta()) + delta
+
+    async def listen(self) -> None:
+        """Слушать брокер, переподключаясь после ошибок."""
+        while True:
+            try:
+                await self.broker.listen(self.receive)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Брокер счетчиков недоступен, повтор через %.0f с", RECONNECT_DELAY)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.dispatch()
+
+    def dispatch(self) -> None:
+        """Раздать накопленное за интервал, по одному приращению на пост."""
+        pending, self._pending = self._pending, {}
+        for post_id, delta in pending.items():
+            if not any(delta):
+                continue
+            for subscription in self.subscriptions.get(post_id, ()):
+                subscription.push(post_id, delta)
+                self.dispatched += 1
+
+    def subscribe(self, post_ids: Iterable[UUID]) -> Subscription:
+        subscription = Subscription(post_ids)
+        for post_id in subscription.post_ids:
+            self.subscriptions[post_id].add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for post_id in subscription.post_ids:
+            subscribers = self.subscriptions.get(post_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscriptions[post_id]
+        self.connections -= 1
+
+
+def create_counts_broker() -> CountsBroker:
+    """Создать брокер по настройкам."""
+    if settings.LIVE_BROKER == "redis":
+        import redis.asyncio as redis
+
+        return RedisCountsBroker(redis.from_url(settings.REDIS_URL))
+    return InMemoryCountsBroker()
+
+
+@lru_cache()
+def get_live_counters() -> LiveCounters:
+    return LiveCounters(create_counts_broker(), settings.LIVE_UPDATES_PER_SECOND)
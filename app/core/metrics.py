@@ -0,0 +1,181 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTimings:
+    """Время, потраченное текущим запросом на БД и другие этапы."""
+
+    __slots__ = ("started", "db_queries", "db_time", "pool_wait", "segments")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.segments: dict[str, float] = {}
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing, длительности в миллисекундах."""
+        parts = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+            f"pool;dur={self.pool_wait * 1000:.2f}",
+        ]
+        parts.extend(f"{name};dur={duration * 1000:.2f}" for name, duration in self.segments.items())
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def measure(name: str):
+    """Засчитать время блока в сегмент name текущего запроса."""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.segments[name] = timings.segments.get(name, 0.0) + time.perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Метрики процесса в формате Prometheus."""
+
+    def __init__(self) -> None:
+        self.latency: defaultdict[tuple[str, str, int], Histogram] = defaultdict(Histogram)
+        self.db_time: defaultdict[tuple[str, str], float] = defaultdict(float)
+        self.db_queries: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self.pool_wait: defaultdict[tuple[str, str], float] = defaultdict(float)
+
+    def observe_request(self, method: str, route: str, status: int, timings: RequestTimings) -> None:
+        self.latency[method, route, status].observe(time.perf_counter() - timings.started)
+        self.db_time[method, route] += timings.db_time
+        self.db_queries[method, route] += timings.db_queries
+        self.pool_wait[method, route] += timings.pool_wait
+
+    def render(
+        self,
+        gauges: Optional[dict[str, float]] = None,
+        counters: Optional[dict[str, float]] = None,
+    ) -> str:
+        """gauges - текущие значения, counters - только растущие, с суффиксом _total."""
+        lines = [
+            "# HELP http_request_duration_seconds Request latency.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram.counts[-1]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+        for name, help_text, values in (
+            ("db_query_seconds_total", "Time spent executing SQL.", self.db_time),
+            ("db_queries_total", "Number of SQL statements.", self.db_queries),
+            ("db_pool_wait_seconds_total", "Time spent waiting for a pooled connection.", self.pool_wait),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), value in sorted(values.items()):
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {value}')
+        for name, value in (counters or {}).items():
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: Server-Timing в ответе и метрики по маршрутам."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"], route.path if route is not None else "unmatched", status, timings
+            )
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, засчитывающий ожидание свободного соединения в текущий запрос."""
+
+    def connect(self):
+        timings = request_timings.get()
+        if timings is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            timings.pool_wait += time.perf_counter() - started
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Считать число и время SQL-запросов текущего запроса."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = request_timings.get()
+        if timings is not None:
+            timings.db_queries += 1
+            timings.db_time += time.perf_counter() - context._query_started
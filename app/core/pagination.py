@@ -0,0 +1,43 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+
+def _encode(value: str, entity_id: UUID) -> str:
+    raw = f"{value}|{entity_id.hex}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[str, UUID]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    value, entity_id = raw.split("|")
+    return value, UUID(hex=entity_id)
+
+
+def encode_cursor(created_at: datetime, entity_id: UUID) -> str:
+    """Закодировать позицию последнего элемента страницы в непрозрачный курсор."""
+    return _encode(created_at.isoformat(), entity_id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Раскодировать курсор. ValueError, если курсор поврежден."""
+    try:
+        created_at, entity_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), entity_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError("Invalid cursor") from error
+
+
+def encode_rank_cursor(rank: float, entity_id: UUID) -> str:
+    """Курсор для выдачи, отсортированной по релевантности."""
+    return _encode(repr(rank), entity_id)
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    """Раскодировать курсор релевантности. ValueError, если курсор поврежден."""
+    try:
+        rank, entity_id = _decode(cursor)
+        return float(rank), entity_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError("Invalid cursor") from error
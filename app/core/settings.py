@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal, Optional
 
 from pydantic import BaseSettings
 from pydantic.tools import lru_cache
@@ -14,17 +15,57 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     DB_HOST: str
     DB_PORT: str
+    DATABASE_URL: Optional[str] = None
+    DATABASE_REPLICA_URLS: str = ''
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2
+    DB_REPLICA_RETRY_INTERVAL: float = 10
+    DB_READ_YOUR_WRITES: int = 5
     SECRET: str = 'SECRET'
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_MAX_CONNECTIONS: int = 90
+    DB_WARMUP: bool = True
+    CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    CACHE_TTL: int = 30
+    CACHE_MAX_SIZE: int = 10000
+    REDIS_URL: Optional[str] = None
+    AUTH_CACHE_TTL: int = 10
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    REACTIONS_WRITE_BEHIND: bool = False
+    REACTIONS_QUEUE_SIZE: int = 10000
+    REACTIONS_BATCH_SIZE: int = 500
+    REACTIONS_FLUSH_INTERVAL: float = 0.1
+    TRENDING_HALF_LIFE_HOURS: float = 12
+    TRENDING_REFRESH_INTERVAL: float = 30
+    LIVE_BROKER: Literal['memory', 'redis'] = 'memory'
+    LIVE_UPDATES_PER_SECOND: float = 2
+    LIVE_KEEPALIVE: float = 15
+    METRICS_TOKEN: Optional[str] = None
 
     @property
     def database_url(self):
-        """Получить ссылку для подключения к DB."""
+        """Получить ссылку для подключения к DB.
+
+        DATABASE_URL, если задан, имеет приоритет над параметрами Postgres.
+        """
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"postgresql+asyncpg://"
             f"{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def replica_urls(self) -> list[str]:
+        """Ссылки на реплики для чтения из DATABASE_REPLICA_URLS через запятую."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(',') if url.strip()]
+
     class Config:
         env_file = ENV_FILE
 
@@ -34,4 +75,15 @@ def get_settings():
     return Settings()
 
 
-settings = get_settings()
+class LazySettings:
+    """Settings, которые читаются из окружения при первом обращении к полю,
+    а не при импорте модуля."""
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(get_settings(), name, value)
+
+
+settings: Settings = LazySettings()
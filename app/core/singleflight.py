@@ -0,0 +1,64 @@
+"""Объединение одинаковых одновременных загрузок (single-flight).
+
+Первый запрос по ключу выполняет загрузку сам, остальные, пришедшие до ее
+завершения, ждут тот же результат или то же исключение. Если первый запрос
+отменен (клиент отключился), ожидающие не получают CancelledError: один
+из них повторяет загрузку.
+"""
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Одна загрузка на ключ в процессе, общий результат для всех ожидающих."""
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """Результат load() для key, общий с одновременными вызовами по тому же key."""
+        self.calls += 1
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, load)
+            self.coalesced += 1
+            try:
+                # shield: отмена одного ожидающего не должна отменять общий future.
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                self.coalesced -= 1
+
+    async def _lead(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as error:
+            flight.set_exception(error)
+            # Исключение уже получил ведущий: без ожидающих future не должен
+            # жаловаться в лог, что его никто не прочитал.
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight}
@@ -1,10 +1,18 @@
+import uuid
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
 from fastapi import Depends
 from pydantic.schema import UUID
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, exists, literal
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_posts_cache
 from app.core.db.db import get_session
-from app.core.db.models import Likes, Posts, Dislikes
+from app.core.db.dialects import upsert_insert, values_table
+from app.core.db.models import Likes, Posts, Dislikes, User
+from app.core.live import counts_deltas, get_live_counters
 
 
 class DislikesService:
@@ -14,12 +22,15 @@ class DislikesService:
     async def get_post_to_check(
         self,
         post_id: UUID,
-    ) -> Posts:
-        """Получить объект поста для проверки"""
+    ) -> Optional[UUID]:
+        """Получить id поста для проверки, None - поста нет.
+
+        Только id: Posts целиком загрузил бы все реакции поста (selectin).
+        """
         post = await self.session.execute(
-            select(Posts).where(Posts.id == post_id)
+            select(Posts.id).where(Posts.id == post_id)
         )
-        return post.scalars().first()
+        return post.scalar()
 
     async def get_like_to_check(
         self,
@@ -57,19 +68,166 @@ class DislikesService:
         self,
         post_id: UUID,
         user_id: UUID
-    ) -> Dislikes:
-        """Создать новый лайк"""
-        new_dislike = Dislikes(post_id=post_id, user_id=user_id)
+    ) -> Optional[Row]:
+        """Создать новый дизлайк одним INSERT ... SELECT ... ON CONFLICT.
 
-        self.session.add(new_dislike)
+        В Postgres INSERT выполняется в CTE вместе с UPDATE счетчика поста -
+        одно выражение и один round-trip до commit. SQLite не поддерживает
+        INSERT в CTE, там счетчик сдвигается вторым UPDATE.
+
+        Вернет None, если поста нет, пост принадлежит пользователю,
+        уже есть лайк или дизлайк этого пользователя.
+        """
+        candidate = select(
+            literal(uuid.uuid4(), Dislikes.id.type), Posts.id, literal(user_id, Dislikes.user_id.type)
+        ).where(
+            Posts.id == post_id,
+            Posts.user_id != user_id,
+            ~exists().where(Likes.post_id == post_id, Likes.user_id == user_id),
+        )
+        insert_dislike = upsert_insert(self.session, Dislikes).from_select(
+            [Dislikes.id, Dislikes.post_id, Dislikes.user_id], candidate
+        ).on_conflict_do_nothing(
+            index_elements=[Dislikes.post_id, Dislikes.user_id]
+        ).returning(Dislikes.id, Dislikes.post_id, Dislikes.user_id)
+        posts = Posts.__table__
+        shift_count = update(posts).values(dislikes_count=posts.c.dislikes_count + 1, version=posts.c.version + 1)
+        if self.session.bind.dialect.name == "postgresql":
+            inserted = insert_dislike.cte("inserted")
+            new_dislike = (await self.session.execute(
+                shift_count.where(posts.c.id == inserted.c.post_id).returning(
+                    inserted.c.id, inserted.c.post_id, inserted.c.user_id
+                )
+            )).first()
+        else:
+            new_dislike = (await self.session.execute(insert_dislike)).first()
+            if new_dislike is not None:
+                await self.session.execute(shift_count.where(posts.c.id == post_id))
+        if new_dislike is None:
+            return None
         await self.session.commit()
-        await self.session.refresh(new_dislike)
+        await get_posts_cache().invalidate(post_id)
+        await get_live_counters().publish(counts_deltas(dislikes_added=[post_id]))
         return new_dislike
 
     async def delete_dislike(self, dislike_id: UUID) -> None:
-        delete_dislike = delete(Dislikes).where(Dislikes.id == dislike_id)
-        await self.session.execute(delete_dislike)
+        delete_dislike = delete(Dislikes).where(Dislikes.id == dislike_id).returning(Dislikes.post_id)
+        post_id = (await self.session.execute(delete_dislike)).scalar()
+        if post_id is not None:
+            await self.session.execute(
+                update(Posts).where(Posts.id == post_id).values(
+                    dislikes_count=Posts.dislikes_count - 1, version=Posts.version + 1
+                )
+            )
         await self.session.commit()
+        if post_id is not None:
+            await get_posts_cache().invalidate(post_id)
+            await get_live_counters().publish(counts_deltas(dislikes_removed=[post_id]))
+
+    async def get_user_dislikes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID
+    ) -> dict[UUID, UUID]:
+        """Получить id дизлайков пользователя к набору постов: {post_id: id}."""
+        dislikes = await self.session.execute(
+            select(Dislikes.post_id, Dislikes.id).where(Dislikes.user_id == user_id).where(Dislikes.post_id.in_(post_ids))
+        )
+        return dict(dislikes.all())
+
+    async def create_dislikes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID,
+        ids: Optional[dict[UUID, UUID]] = None
+    ) -> dict[UUID, UUID]:
+        """Создать дизлайки к набору постов одним INSERT без commit.
+
+        Проверки должны быть выполнены заранее, уже существующие пропускаются.
+        ids - заранее выданные id по post_id, для остальных создаются новые.
+        """
+        ids = ids or {}
+        values = [
+            dict(id=ids.get(post_id) or uuid.uuid4(), post_id=post_id, user_id=user_id)
+            for post_id in post_ids
+        ]
+        if not values:
+            return {}
+        insert_dislikes = upsert_insert(self.session, Dislikes).values(values).on_conflict_do_nothing(
+            index_elements=[Dislikes.post_id, Dislikes.user_id]
+        ).returning(Dislikes.post_id, Dislikes.id)
+        created = dict((await self.session.execute(insert_dislikes)).all())
+        await self._shift_dislikes_count(list(created), +1)
+        return created
+
+    async def delete_user_dislikes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID
+    ) -> dict[UUID, UUID]:
+        """Удалить дизлайки пользователя к набору постов одним DELETE без commit."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        delete_dislikes = delete(Dislikes).where(Dislikes.user_id == user_id).where(
+            Dislikes.post_id.in_(post_ids)
+        ).returning(Dislikes.post_id, Dislikes.id)
+        deleted = dict((await self.session.execute(delete_dislikes)).all())
+        await self._shift_dislikes_count(list(deleted), -1)
+        return deleted
+
+    async def insert_dislikes(self, dislikes: list[dict]) -> list[UUID]:
+        """Вставить дизлайки с заранее выданными id одним INSERT без commit.
+
+        Пропускаются уже существующие, реакции на удаленные и собственные
+        посты, от удаленных пользователей и при уже записанной противоположной
+        реакции - ее мог записать другой воркер. Вернет post_id вставленных.
+        """
+        if not dislikes:
+            return []
+        columns = [Dislikes.id, Dislikes.post_id, Dislikes.user_id]
+        candidates = values_table(
+            self.session, "candidates", columns,
+            [(dislike["id"], dislike["post_id"], dislike["user_id"]) for dislike in dislikes],
+        )
+        # Те же проверки, что в create_dislike: не свой пост и нет противоположной реакции.
+        existing = select(candidates).join(Posts, Posts.id == candidates.c.post_id).join(
+            User, User.id == candidates.c.user_id
+        ).where(
+            Posts.user_id != candidates.c.user_id,
+            ~exists().where(Likes.post_id == candidates.c.post_id, Likes.user_id == candidates.c.user_id),
+        )
+        insert_dislikes = upsert_insert(self.session, Dislikes).from_select(
+            columns, existing
+        ).on_conflict_do_nothing(index_elements=[Dislikes.post_id, Dislikes.user_id]).returning(Dislikes.post_id)
+        post_ids = (await self.session.execute(insert_dislikes)).scalars().all()
+        await self._shift_dislikes_count(post_ids, +1)
+        return post_ids
+
+    async def delete_dislikes_by_id(self, dislike_ids: Iterable[UUID]) -> list[UUID]:
+        """Удалить дизлайки по id одним DELETE без commit, вернет post_id удаленных."""
+        dislike_ids = list(dislike_ids)
+        if not dislike_ids:
+            return []
+        delete_dislikes = delete(Dislikes).where(Dislikes.id.in_(dislike_ids)).returning(Dislikes.post_id)
+        post_ids = (await self.session.execute(delete_dislikes)).scalars().all()
+        await self._shift_dislikes_count(post_ids, -1)
+        return post_ids
+
+    async def _shift_dislikes_count(self, post_ids: Iterable[UUID], sign: int) -> None:
+        """Сдвинуть dislikes_count на число вхождений поста в post_ids.
+
+        Посты группируются по величине сдвига, один UPDATE на группу.
+        """
+        groups = defaultdict(list)
+        for post_id, count in Counter(post_ids).items():
+            groups[count].append(post_id)
+        for count, group in groups.items():
+            await self.session.execute(
+                update(Posts).where(Posts.id.in_(group)).values(
+                    dislikes_count=Posts.dislikes_count + sign * count, version=Posts.version + 1
+                )
+            )
 
 
 async def get_dislikes_service(session: AsyncSession = Depends(get_session)) -> DislikesService:
@@ -1,10 +1,18 @@
+import uuid
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
 from fastapi import Depends
 from pydantic.schema import UUID
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, exists, literal
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_posts_cache
 from app.core.db.db import get_session
-from app.core.db.models import Likes, Posts, Dislikes
+from app.core.db.dialects import upsert_insert, values_table
+from app.core.db.models import Likes, Posts, Dislikes, User
+from app.core.live import counts_deltas, get_live_counters
 
 
 class LikesService:
@@ -14,12 +22,15 @@ class LikesService:
     async def get_post_to_check(
         self,
         post_id: UUID,
-    ):
-        """Получить объект поста для проверки"""
+    ) -> Optional[UUID]:
+        """Получить id поста для проверки, None - поста нет.
+
+        Только id: Posts целиком загрузил бы все реакции поста (selectin).
+        """
         post = await self.session.execute(
-            select(Posts).where(Posts.id == post_id)
+            select(Posts.id).where(Posts.id == post_id)
         )
-        return post.scalars().first()
+        return post.scalar()
 
     async def get_dislike_to_check(
         self,
@@ -57,19 +68,166 @@ class LikesService:
         self,
         post_id: UUID,
         user_id: UUID
-    ) -> Likes:
-        """Создать новый лайк"""
-        new_like = Likes(post_id=post_id, user_id=user_id)
+    ) -> Optional[Row]:
+        """Создать новый лайк одним INSERT ... SELECT ... ON CONFLICT.
 
-        self.session.add(new_like)
+        В Postgres INSERT выполняется в CTE вместе с UPDATE счетчика поста -
+        одно выражение и один round-trip до commit. SQLite не поддерживает
+        INSERT в CTE, там счетчик сдвигается вторым UPDATE.
+
+        Вернет None, если поста нет, пост принадлежит пользователю,
+        уже есть дизлайк или лайк этого пользователя.
+        """
+        candidate = select(
+            literal(uuid.uuid4(), Likes.id.type), Posts.id, literal(user_id, Likes.user_id.type)
+        ).where(
+            Posts.id == post_id,
+            Posts.user_id != user_id,
+            ~exists().where(Dislikes.post_id == post_id, Dislikes.user_id == user_id),
+        )
+        insert_like = upsert_insert(self.session, Likes).from_select(
+            [Likes.id, Likes.post_id, Likes.user_id], candidate
+        ).on_conflict_do_nothing(
+            index_elements=[Likes.post_id, Likes.user_id]
+        ).returning(Likes.id, Likes.post_id, Likes.user_id)
+        posts = Posts.__table__
+        shift_count = update(posts).values(likes_count=posts.c.likes_count + 1, version=posts.c.version + 1)
+        if self.session.bind.dialect.name == "postgresql":
+            inserted = insert_like.cte("inserted")
+            new_like = (await self.session.execute(
+                shift_count.where(posts.c.id == inserted.c.post_id).returning(
+                    inserted.c.id, inserted.c.post_id, inserted.c.user_id
+                )
+            )).first()
+        else:
+            new_like = (await self.session.execute(insert_like)).first()
+            if new_like is not None:
+                await self.session.execute(shift_count.where(posts.c.id == post_id))
+        if new_like is None:
+            return None
         await self.session.commit()
-        await self.session.refresh(new_like)
+        await get_posts_cache().invalidate(post_id)
+        await get_live_counters().publish(counts_deltas(likes_added=[post_id]))
         return new_like
 
     async def delete_like(self, like_id: UUID) -> None:
-        delete_like = delete(Likes).where(Likes.id == like_id)
-        await self.session.execute(delete_like)
+        delete_like = delete(Likes).where(Likes.id == like_id).returning(Likes.post_id)
+        post_id = (await self.session.execute(delete_like)).scalar()
+        if post_id is not None:
+            await self.session.execute(
+                update(Posts).where(Posts.id == post_id).values(
+                    likes_count=Posts.likes_count - 1, version=Posts.version + 1
+                )
+            )
         await self.session.commit()
+        if post_id is not None:
+            await get_posts_cache().invalidate(post_id)
+            await get_live_counters().publish(counts_deltas(likes_removed=[post_id]))
+
+    async def get_user_likes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID
+    ) -> dict[UUID, UUID]:
+        """Получить id лайков пользователя к набору постов: {post_id: id}."""
+        likes = await self.session.execute(
+            select(Likes.post_id, Likes.id).where(Likes.user_id == user_id).where(Likes.post_id.in_(post_ids))
+        )
+        return dict(likes.all())
+
+    async def create_likes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID,
+        ids: Optional[dict[UUID, UUID]] = None
+    ) -> dict[UUID, UUID]:
+        """Создать лайки к набору постов одним INSERT без commit.
+
+        Проверки должны быть выполнены заранее, уже существующие пропускаются.
+        ids - заранее выданные id по post_id, для остальных создаются новые.
+        """
+        ids = ids or {}
+        values = [
+            dict(id=ids.get(post_id) or uuid.uuid4(), post_id=post_id, user_id=user_id)
+            for post_id in post_ids
+        ]
+        if not values:
+            return {}
+        insert_likes = upsert_insert(self.session, Likes).values(values).on_conflict_do_nothing(
+            index_elements=[Likes.post_id, Likes.user_id]
+        ).returning(Likes.post_id, Likes.id)
+        created = dict((await self.session.execute(insert_likes)).all())
+        await self._shift_likes_count(list(created), +1)
+        return created
+
+    async def delete_user_likes(
+        self,
+        post_ids: Iterable[UUID],
+        user_id: UUID
+    ) -> dict[UUID, UUID]:
+        """Удалить лайки пользователя к набору постов одним DELETE без commit."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        delete_likes = delete(Likes).where(Likes.user_id == user_id).where(
+            Likes.post_id.in_(post_ids)
+        ).returning(Likes.post_id, Likes.id)
+        deleted = dict((await self.session.execute(delete_likes)).all())
+        await self._shift_likes_count(list(deleted), -1)
+        return deleted
+
+    async def insert_likes(self, likes: list[dict]) -> list[UUID]:
+        """Вставить лайки с заранее выданными id одним INSERT без commit.
+
+        Пропускаются уже существующие, реакции на удаленные и собственные
+        посты, от удаленных пользователей и при уже записанной противоположной
+        реакции - ее мог записать другой воркер. Вернет post_id вставленных.
+        """
+        if not likes:
+            return []
+        columns = [Likes.id, Likes.post_id, Likes.user_id]
+        candidates = values_table(
+            self.session, "candidates", columns,
+            [(like["id"], like["post_id"], like["user_id"]) for like in likes],
+        )
+        # Те же проверки, что в create_like: не свой пост и нет противоположной реакции.
+        existing = select(candidates).join(Posts, Posts.id == candidates.c.post_id).join(
+            User, User.id == candidates.c.user_id
+        ).where(
+            Posts.user_id != candidates.c.user_id,
+            ~exists().where(Dislikes.post_id == candidates.c.post_id, Dislikes.user_id == candidates.c.user_id),
+        )
+        insert_likes = upsert_insert(self.session, Likes).from_select(
+            columns, existing
+        ).on_conflict_do_nothing(index_elements=[Likes.post_id, Likes.user_id]).returning(Likes.post_id)
+        post_ids = (await self.session.execute(insert_likes)).scalars().all()
+        await self._shift_likes_count(post_ids, +1)
+        return post_ids
+
+    async def delete_likes_by_id(self, like_ids: Iterable[UUID]) -> list[UUID]:
+        """Удалить лайки по id одним DELETE без commit, вернет post_id удаленных."""
+        like_ids = list(like_ids)
+        if not like_ids:
+            return []
+        delete_likes = delete(Likes).where(Likes.id.in_(like_ids)).returning(Likes.post_id)
+        post_ids = (await self.session.execute(delete_likes)).scalars().all()
+        await self._shift_likes_count(post_ids, -1)
+        return post_ids
+
+    async def _shift_likes_count(self, post_ids: Iterable[UUID], sign: int) -> None:
+        """Сдвинуть likes_count на число вхождений поста в post_ids.
+
+        Посты группируются по величине сдвига, один UPDATE на группу.
+        """
+        groups = defaultdict(list)
+        for post_id, count in Counter(post_ids).items():
+            groups[count].append(post_id)
+        for count, group in groups.items():
+            await self.session.execute(
+                update(Posts).where(Posts.id.in_(group)).values(
+                    likes_count=Posts.likes_count + sign * count, version=Posts.version + 1
+                )
+            )
 
 
 async def get_likes_service(session: AsyncSession = Depends(get_session)) -> LikesService:
@@ -1,12 +1,44 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
 from fastapi import Depends
 from pydantic.schema import UUID
-from sqlalchemy import select, update, delete
+from sqlalchemy import Select, insert, select, update, delete, tuple_
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_posts_cache
 from app.core.db.db import get_session
 from app.core.db.models import Posts, Likes, Dislikes
+from app.core.db.replicas import get_read_session
+from app.core.db.search import apply_search
 from app.api.request_models.posts import PostsCreateAndUpdateRequest
 
+POSTS_COUNTS_COLUMNS = (
+    Posts.id,
+    Posts.title,
+    Posts.description,
+    Posts.user_id,
+    Posts.created_at,
+    Posts.likes_count,
+    Posts.dislikes_count,
+    Posts.version,
+    Posts.updated_at,
+)
+# Колонки курсоров и валидаторов, читаются при любом наборе fields.
+POSTS_KEY_FIELDS = ("id", "created_at", "version", "updated_at")
+REACTIONS_MODELS = {"likes": Likes, "dislikes": Dislikes}
+IMPORT_COLUMNS = ("id", "title", "description", "user_id", "created_at", "updated_at")
+DELETE_BATCH_SIZE = 500
+
+
+def posts_columns(fields: Iterable[str]) -> tuple:
+    """Колонки Posts для выдачи полей fields: сами поля и POSTS_KEY_FIELDS."""
+    names = set(fields).union(POSTS_KEY_FIELDS)
+    return tuple(column for column in POSTS_COUNTS_COLUMNS if column.key in names)
+
 
 class PostsService:
     def __init__(self, session: AsyncSession) -> None:
@@ -22,10 +54,137 @@ class PostsService:
         )
         return post.scalars().first()
 
-    async def get_all_post(self):
-        """Получить все объекты постов."""
-        all_post = await self.session.execute(select(Posts))
-        return all_post.scalars().all()
+    async def get_post_fields(self, post_id: UUID, columns: tuple) -> Optional[Row]:
+        """Получить только колонки columns поста, без лайков и дизлайков."""
+        post = await self.session.execute(
+            select(*columns).where(Posts.id == post_id)
+        )
+        return post.first()
+
+    async def get_posts_reactions(
+        self, post_ids: list[UUID], include: Iterable[str]
+    ) -> dict[str, dict[UUID, list[Row]]]:
+        """Лайки и/или дизлайки постов post_ids, по запросу на каждый список include.
+
+        Вернет {"likes": {post_id: [строки]}, ...} в порядке include.
+        """
+        reactions = {}
+        for name in include:
+            model = REACTIONS_MODELS[name]
+            by_post = defaultdict(list)
+            if post_ids:
+                rows = await self.session.execute(
+                    select(model.id, model.post_id, model.user_id).where(model.post_id.in_(post_ids))
+                )
+                for row in rows:
+                    by_post[row.post_id].append(row)
+            reactions[name] = by_post
+        return reactions
+
+    async def get_post_owner(self, post_id: UUID) -> Optional[UUID]:
+        """Получить только user_id поста для проверки прав, None - поста нет."""
+        owner = await self.session.execute(
+            select(Posts.user_id).where(Posts.id == post_id)
+        )
+        return owner.scalar()
+
+    async def get_post_version(self, post_id: UUID) -> Optional[Row]:
+        """Получить только version и updated_at поста для условного GET."""
+        version = await self.session.execute(
+            select(Posts.version, Posts.updated_at).where(Posts.id == post_id)
+        )
+        return version.first()
+
+    @staticmethod
+    def _page(
+        query: Select,
+        limit: int,
+        after: Optional[tuple[datetime, UUID]],
+        user_id: Optional[UUID] = None,
+    ) -> Select:
+        if user_id is not None:
+            query = query.where(Posts.user_id == user_id)
+        query = query.order_by(Posts.created_at.desc(), Posts.id.desc())
+        if after is not None:
+            query = query.where(tuple_(Posts.created_at, Posts.id) < after)
+        return query.limit(limit)
+
+    async def get_all_post(
+        self,
+        limit: int,
+        after: Optional[tuple[datetime, UUID]] = None,
+        columns: tuple = POSTS_COUNTS_COLUMNS,
+    ) -> list[Row]:
+        """Получить страницу постов, от новых к старым.
+
+        after - (created_at, id) последнего поста предыдущей страницы.
+        Возвращаются строки с колонками columns, лайки и дизлайки
+        загружает get_posts_reactions.
+        """
+        all_post = await self.session.execute(self._page(select(*columns), limit, after))
+        return all_post.all()
+
+    async def get_author_posts(
+        self,
+        user_id: UUID,
+        limit: int,
+        after: Optional[tuple[datetime, UUID]] = None,
+        columns: tuple = POSTS_COUNTS_COLUMNS,
+    ) -> list[Row]:
+        """Получить страницу постов автора со счетчиками, от новых к старым.
+
+        Один диапазон индекса (user_id, created_at, id).
+        """
+        query = self._page(select(*columns), limit, after, user_id)
+        author_posts = await self.session.execute(query)
+        return author_posts.all()
+
+    async def get_all_post_versions(
+        self,
+        limit: int,
+        after: Optional[tuple[datetime, UUID]] = None,
+        user_id: Optional[UUID] = None,
+    ) -> list[Row]:
+        """Получить id, version и updated_at постов той же страницы,
+        что и get_all_post или get_author_posts.
+        """
+        query = select(Posts.id, Posts.version, Posts.updated_at)
+        versions = await self.session.execute(self._page(query, limit, after, user_id))
+        return versions.all()
+
+    async def search_posts(
+        self,
+        text: str,
+        limit: int,
+        after: Optional[tuple[float, UUID]] = None,
+        columns: tuple = POSTS_COUNTS_COLUMNS,
+    ) -> list[Row]:
+        """Найти посты по заголовку и описанию, от самых релевантных.
+
+        after - (rank, id) последнего поста предыдущей страницы.
+        Возвращаются строки с колонками columns и колонкой rank.
+        """
+        query, rank = apply_search(
+            select(*columns).select_from(Posts), self.session.bind.dialect.name, text
+        )
+        query = query.add_columns(rank.label("rank")).order_by(rank.desc(), Posts.id.desc())
+        if after is not None:
+            query = query.where(tuple_(rank, Posts.id) < after)
+        found = await self.session.execute(query.limit(limit))
+        return found.all()
+
+    async def stream_posts(
+        self,
+        after: Optional[UUID],
+        chunk_size: int,
+    ) -> AsyncIterator[list]:
+        """Читать посты со счетчиками в порядке id пачками через серверный курсор."""
+        query = select(*POSTS_COUNTS_COLUMNS).order_by(Posts.id)
+        if after is not None:
+            query = query.where(Posts.id > after)
+        result = await self.session.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
 
     async def create_post(
         self,
@@ -42,6 +201,29 @@ class PostsService:
         await self.session.refresh(new_post)
         return new_post
 
+    async def insert_posts(self, posts: list[dict], user_id: UUID) -> int:
+        """Вставить пачку проверенных постов автора без коммита.
+
+        В Postgres строки передаются через COPY соединения asyncpg, в остальных
+        базах - одним многострочным INSERT. Вернет число вставленных постов.
+        """
+        now = datetime.utcnow()
+        records = [
+            (uuid.uuid4(), post["title"], post["description"], user_id, now, now)
+            for post in posts
+        ]
+        if self.session.bind.dialect.name == "postgresql":
+            connection = await self.session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                Posts.__tablename__, records=records, columns=IMPORT_COLUMNS
+            )
+        else:
+            await self.session.execute(
+                insert(Posts), [dict(zip(IMPORT_COLUMNS, record)) for record in records]
+            )
+        return len(records)
+
     async def update_post(
         self,
         post_id: UUID,
@@ -54,18 +236,51 @@ class PostsService:
                 Posts
             ).where(
                 Posts.id == post_id
-            ).values(**post_data)
+            ).values(**post_data, version=Posts.version + 1)
         )
         await self.session.execute(update_data)
         await self.session.commit()
+        await get_posts_cache().invalidate(post_id)
         return await self.get_post(post_id)
 
     async def delete_post(self, post_id: UUID) -> None:
-        """Удалить объект поста"""
+        """Удалить объект поста.
+
+        Лайки, дизлайки и рейтинг поста удаляет ON DELETE CASCADE в БД.
+        """
         delete_post = delete(Posts).where(Posts.id == post_id)
         await self.session.execute(delete_post)
         await self.session.commit()
+        await get_posts_cache().invalidate(post_id)
+
+    async def delete_user_posts(self, user_id: UUID, batch_size: int = DELETE_BATCH_SIZE) -> int:
+        """Удалить все посты автора пачками по batch_size.
+
+        Каждая пачка удаляется в своей транзакции, поэтому блокировки и объем
+        каскадного удаления реакций ограничены одной пачкой. Вернет число
+        удаленных постов.
+        """
+        select_batch = select(Posts.id).where(Posts.user_id == user_id).limit(batch_size)
+        deleted = 0
+        while True:
+            post_ids = (await self.session.execute(select_batch)).scalars().all()
+            if not post_ids:
+                break
+            await self.session.execute(delete(Posts).where(Posts.id.in_(post_ids)))
+            await self.session.commit()
+            await get_posts_cache().invalidate(*post_ids)
+            deleted += len(post_ids)
+            if len(post_ids) < batch_size:
+                break
+        return deleted
 
 
 async def get_posts_service(session: AsyncSession = Depends(get_session)) -> PostsService:
     return PostsService(session)
+
+
+async def get_posts_read_service(
+    session: AsyncSession = Depends(get_read_session)
+) -> PostsService:
+    """PostsService для GET-запросов: читает с реплики, если они настроены."""
+    return PostsService(session)
@@ -0,0 +1,202 @@
+"""Пакетный импорт постов из NDJSON или CSV.
+
+Поток читается построчно, строки проверяются PostsCreateAndUpdateRequest
+и записываются пачками по IMPORT_CHUNK_SIZE, поэтому в памяти находится
+не больше одной пачки. Каждая пачка пишется и коммитится отдельно:
+ошибка вставки отбрасывает только ее, отчет собирается по пачкам.
+"""
+import codecs
+import csv
+import enum
+from typing import AsyncIterator, NamedTuple, Optional, Union
+
+from pydantic import ValidationError
+from pydantic.schema import UUID
+
+from app.api.request_models.posts import PostsCreateAndUpdateRequest
+from app.core.db.models import Posts
+from app.crud.posts_crud import PostsService
+
+try:
+    import orjson
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:  # pragma: no cover
+    import json
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_LINE = 64 * 1024
+IMPORT_MAX_ERRORS = 100
+IMPORT_MAX_CHUNKS = 20
+
+STR_LINE_TOO_LONG = f"Строка длиннее {IMPORT_MAX_LINE} символов"
+STR_INVALID_JSON = "Некорректный JSON"
+STR_NOT_AN_OBJECT = "Ожидался JSON-объект"
+STR_COLUMNS_MISMATCH = "Число полей не совпадает с заголовком"
+STR_TOO_LONG = "Поле {field} длиннее {length} символов"
+
+
+class ImportFormat(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ChunkReport(NamedTuple):
+    """Итог записи одной пачки: номера строк, число вставленных и ошибки."""
+    chunk: int
+    first_line: int
+    last_line: int
+    inserted: int
+    rejected: int
+    errors: list[dict]
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, Optional[str]]]:
+    """Номера и строки потока без перевода строки.
+
+    Вместо строк длиннее IMPORT_MAX_LINE возвращается None, их содержимое
+    не накапливается.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer, number, skipping = "", 0, False
+    async for data in stream:
+        buffer += decoder.decode(data)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            too_long = skipping or len(line) > IMPORT_MAX_LINE
+            yield number, None if too_long else line.rstrip("\r")
+            skipping = False
+        if len(buffer) > IMPORT_MAX_LINE:
+            buffer, skipping = "", True
+    buffer += decoder.decode(b"", final=True)
+    if buffer or skipping:
+        yield number + 1, None if skipping else buffer.rstrip("\r")
+
+
+async def iter_ndjson(
+    lines: AsyncIterator[tuple[int, Optional[str]]]
+) -> AsyncIterator[tuple[int, Union[dict, str]]]:
+    """Номер строки и объект либо текст ошибки разбора. Пустые строки пропускаются."""
+    async for number, line in lines:
+        if line is None:
+            yield number, STR_LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except JSONDecodeError:
+            yield number, STR_INVALID_JSON
+            continue
+        yield number, record if isinstance(record, dict) else STR_NOT_AN_OBJECT
+
+
+async def iter_csv(
+    lines: AsyncIterator[tuple[int, Optional[str]]]
+) -> AsyncIterator[tuple[int, Union[dict, str]]]:
+    """Номер первой строки записи и словарь по заголовку либо текст ошибки.
+
+    Первая строка - заголовок. Запись может занимать несколько строк,
+    если перевод строки стоит внутри кавычек.
+    """
+    header, record, first = None, [], 0
+    async for number, line in lines:
+        if line is None:
+            yield number, STR_LINE_TOO_LONG
+            record = []
+            continue
+        if not record:
+            first = number
+        record.append(line)
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            if len(text) > IMPORT_MAX_LINE:
+                yield first, STR_LINE_TOO_LONG
+                record = []
+            continue
+        record = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield first, STR_COLUMNS_MISMATCH
+        else:
+            yield first, dict(zip(header, values))
+    if record:
+        yield first, STR_COLUMNS_MISMATCH
+
+
+def validate_post(record: dict) -> Union[dict, str]:
+    """Проверить запись как тело POST /posts и по длине колонок."""
+    try:
+        post_data = PostsCreateAndUpdateRequest.parse_obj(record).dict()
+    except ValidationError as error:
+        return "; ".join(
+            f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors()
+        )
+    for field, value in post_data.items():
+        length = Posts.__table__.c[field].type.length
+        if len(value) > length:
+            return STR_TOO_LONG.format(field=field, length=length)
+    return post_data
+
+
+class PostsImporter:
+    """Импорт постов одного автора пачками через PostsService."""
+
+    def __init__(self, posts_service: PostsService, chunk_size: int = IMPORT_CHUNK_SIZE) -> None:
+        self.posts_service = posts_service
+        self.chunk_size = chunk_size
+
+    async def run(
+        self,
+        stream: AsyncIterator[bytes],
+        import_format: ImportFormat,
+        user_id: UUID,
+    ) -> AsyncIterator[ChunkReport]:
+        """Импортировать посты из потока байт, отчет по каждой пачке."""
+        parse = iter_csv if import_format == ImportFormat.csv else iter_ndjson
+        chunk, posts, errors, rejected, first_line = 1, [], [], 0, None
+        async for number, record in parse(iter_lines(stream)):
+            if first_line is None:
+                first_line = number
+            post_data = validate_post(record) if isinstance(record, dict) else record
+            if isinstance(post_data, dict):
+                posts.append(post_data)
+            else:
+                rejected += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(dict(line=number, error=post_data))
+            if len(posts) + rejected >= self.chunk_size:
+                yield await self._write(chunk, first_line, number, posts, rejected, errors, user_id)
+                chunk, posts, errors, rejected, first_line = chunk + 1, [], [], 0, None
+        if first_line is not None:
+            yield await self._write(chunk, first_line, number, posts, rejected, errors, user_id)
+
+    async def _write(
+        self,
+        chunk: int,
+        first_line: int,
+        last_line: int,
+        posts: list[dict],
+        rejected: int,
+        errors: list[dict],
+        user_id: UUID,
+    ) -> ChunkReport:
+        inserted = 0
+        if posts:
+            try:
+                inserted = await self.posts_service.insert_posts(posts, user_id)
+                await self.posts_service.session.commit()
+            except Exception as error:
+                # На Postgres COPY идет мимо SQLAlchemy, ошибки драйвера не оборачиваются.
+                await self.posts_service.session.rollback()
+                rejected += len(posts)
+                error = getattr(error, "orig", None) or error
+                errors.append(dict(line=None, error=str(error).splitlines()[0]))
+        return ChunkReport(chunk, first_line, last_line, inserted, rejected, errors)
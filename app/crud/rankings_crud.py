@@ -0,0 +1,109 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.dialects import upsert_insert
+from app.core.db.models import PostRankings, Posts
+from app.core.db.replicas import get_read_session
+from app.core.settings import settings
+from app.crud.posts_crud import POSTS_COUNTS_COLUMNS
+
+REFRESH_CHUNK = 1000
+# Транзакции, выставившие updated_at раньше watermark, но закоммиченные позже,
+# подхватываются за счет перекрытия.
+REFRESH_LOOKBACK = timedelta(minutes=1)
+
+
+def trending_score(
+    likes_count: int, dislikes_count: int, created_at: datetime, half_life_hours: float
+) -> float:
+    """Рейтинг с экспоненциальным затуханием по возрасту поста.
+
+    Пост, опубликованный на half_life_hours позже, догоняет более старый при вдвое
+    меньшем перевесе лайков над дизлайками. Затухание записано в логарифмической
+    шкале, поэтому рейтинг не зависит от текущего времени и пересчитывается
+    только при изменении реакций.
+    """
+    net = likes_count - dislikes_count
+    sign = (net > 0) - (net < 0)
+    age_weight = created_at.replace(tzinfo=timezone.utc).timestamp() / (half_life_hours * 3600)
+    return sign * math.log2(max(abs(net), 1)) + age_weight
+
+
+class RankingsService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_top_posts(self, limit: int, columns: tuple = POSTS_COUNTS_COLUMNS) -> list[Row]:
+        """Получить limit постов с наибольшим рейтингом, строки с колонками columns.
+
+        Сначала limit строк из индекса по score, затем посты по первичному ключу.
+        """
+        top = select(PostRankings.id, PostRankings.score).order_by(
+            PostRankings.score.desc(), PostRankings.id.desc()
+        ).limit(limit).subquery()
+        top_posts = await self.session.execute(
+            select(*columns)
+            .join(top, top.c.id == Posts.id)
+            .order_by(top.c.score.desc(), top.c.id.desc())
+        )
+        return top_posts.all()
+
+    async def get_watermark(self) -> Optional[datetime]:
+        """Самый поздний updated_at поста, уже учтенный в рейтинге.
+
+        Читает всю таблицу, вызывается один раз при старте обновления.
+        """
+        return (await self.session.execute(select(func.max(PostRankings.source_updated_at)))).scalar()
+
+    async def refresh(self, since: Optional[datetime] = None) -> tuple[int, Optional[datetime]]:
+        """Пересчитать рейтинг постов, измененных после since, без since - всех.
+
+        Посты читаются пачками по (updated_at, id), каждая пачка записывается
+        пакетным upsert в своей транзакции. Вернет число пересчитанных постов
+        и новый watermark.
+        """
+        query = select(
+            Posts.id, Posts.created_at, Posts.updated_at, Posts.likes_count, Posts.dislikes_count
+        ).order_by(Posts.updated_at, Posts.id).limit(REFRESH_CHUNK)
+        if since is not None:
+            query = query.where(Posts.updated_at > since - REFRESH_LOOKBACK)
+        upsert_rankings = upsert_insert(self.session, PostRankings)
+        upsert_rankings = upsert_rankings.on_conflict_do_update(
+            index_elements=[PostRankings.id],
+            set_=dict(
+                score=upsert_rankings.excluded.score,
+                source_updated_at=upsert_rankings.excluded.source_updated_at,
+            ),
+        )
+        refreshed, watermark, after = 0, since, None
+        while True:
+            chunk_query = query if after is None else query.where(tuple_(Posts.updated_at, Posts.id) > after)
+            posts = (await self.session.execute(chunk_query)).all()
+            if not posts:
+                break
+            await self.session.execute(upsert_rankings, [
+                dict(
+                    id=post.id,
+                    score=trending_score(
+                        post.likes_count, post.dislikes_count, post.created_at,
+                        settings.TRENDING_HALF_LIFE_HOURS,
+                    ),
+                    source_updated_at=post.updated_at,
+                )
+                for post in posts
+            ])
+            await self.session.commit()
+            refreshed += len(posts)
+            after = (posts[-1].updated_at, posts[-1].id)
+            watermark = max(watermark or after[0], after[0])
+        return refreshed, watermark
+
+
+async def get_rankings_service(session: AsyncSession = Depends(get_read_session)) -> RankingsService:
+    return RankingsService(session)
@@ -0,0 +1,63 @@
+"""Фоновое обновление рейтинга постов.
+
+Раз в TRENDING_REFRESH_INTERVAL секунд пересчитываются только посты,
+у которых с прошлого раза изменился updated_at: новые посты, правки
+и любые изменения счетчиков реакций.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from pydantic.tools import lru_cache
+
+from app.core.db.db import async_session
+from app.core.settings import settings
+from app.crud.rankings_crud import RankingsService
+
+logger = logging.getLogger(__name__)
+
+
+class RankingsRefresher:
+    """Периодическая задача инкрементального обновления post_rankings."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.watermark: Optional[datetime] = None
+        self.refreshed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh(self) -> int:
+        async with async_session() as session:
+            rankings_service = RankingsService(session)
+            if self.watermark is None:
+                self.watermark = await rankings_service.get_watermark()
+            refreshed, self.watermark = await rankings_service.refresh(self.watermark)
+        self.refreshed += refreshed
+        return refreshed
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Не удалось обновить рейтинг постов")
+            await asyncio.sleep(self.interval)
+
+
+@lru_cache()
+def get_rankings_refresher() -> RankingsRefresher:
+    return RankingsRefresher(settings.TRENDING_REFRESH_INTERVAL)
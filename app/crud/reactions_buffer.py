@@ -0,0 +1,259 @@
+"""Отложенная запись лайков и дизлайков (write-behind).
+
+Реакции проверяются и подтверждаются сразу, а в БД попадают фоновой задачей
+пачками: по одному DELETE и одному INSERT на тип реакции и один commit на
+пачку. INSERT пропускает реакции на уже удаленные посты и от удаленных
+пользователей. Пока пачка не записана, ее итоговое состояние хранится в pending,
+чтобы следующие проверки его учитывали.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from pydantic.schema import UUID
+from pydantic.tools import lru_cache
+from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from app.api.request_models.reactions import ReactionAction, ReactionType
+from app.core.cache import get_posts_cache
+from app.core.db.db import async_session
+from app.core.live import counts_deltas, get_live_counters
+from app.core.settings import settings
+from app.crud.dislikes_crud import DislikesService
+from app.crud.likes_crud import LikesService
+
+logger = logging.getLogger(__name__)
+
+ReactionKey = tuple[ReactionType, UUID, UUID]
+
+# Ошибки, после которых пачку стоит записать еще раз: соединение или пул.
+# Повтор безопасен: DELETE по id и INSERT ... ON CONFLICT DO NOTHING
+# после уже прошедшего commit ничего не меняют.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError, OSError, asyncio.TimeoutError)
+FLUSH_ATTEMPTS = 3
+FLUSH_RETRY_DELAY = 0.5
+
+
+class ReactionEvent(NamedTuple):
+    seq: int
+    action: ReactionAction
+    reaction: ReactionType
+    id: UUID
+    post_id: UUID
+    user_id: UUID
+
+    @property
+    def key(self) -> ReactionKey:
+        return self.reaction, self.post_id, self.user_id
+
+
+class PendingReaction(NamedTuple):
+    """Состояние реакции после последнего события в очереди, id=None - удалена."""
+    id: Optional[UUID]
+    seq: int
+
+
+class ReactionsBuffer:
+    """Ограниченная очередь реакций и задача, записывающая ее в БД пачками."""
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: dict[ReactionKey, PendingReaction] = {}
+        self.pending_ids: dict[UUID, ReactionKey] = {}
+        self.flushed = 0
+        self.dropped = 0
+        self.retried = 0
+        self.closed = False
+        self._seq = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self.closed = False
+        self._queue = asyncio.Queue(self.max_size)
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Дождаться записи всего, что уже стоит в очереди."""
+        if self._task is None:
+            return
+        self.closed = True
+        # Сначала разбудить ожидающую пачку: при полной очереди место для None
+        # освободит только она.
+        self._full.set()
+        if not self._task.done():
+            await self._queue.put(None)
+        try:
+            await self._task
+        except Exception:
+            logger.exception("Задача записи реакций завершилась с ошибкой")
+        self._task = None
+
+    async def put(
+        self,
+        action: ReactionAction,
+        reaction: ReactionType,
+        reaction_id: UUID,
+        post_id: UUID,
+        user_id: UUID
+    ) -> None:
+        """Поставить событие в очередь. При заполненной очереди ждет места.
+
+        pending обновляется только после того, как событие попало в очередь:
+        отмененный в ожидании места вызов не оставляет следов. Queue.put
+        не уступает управление после вставки, поэтому пачка с этим событием
+        не может записаться раньше, чем оно попадет в pending.
+        """
+        if self._task is None or self._task.done() or self.closed:
+            raise RuntimeError("Буфер реакций не запущен")
+        self._seq += 1
+        event = ReactionEvent(self._seq, action, reaction, reaction_id, post_id, user_id)
+        await self._queue.put(event)
+        if action is ReactionAction.create:
+            self.pending[event.key] = PendingReaction(reaction_id, event.seq)
+            self.pending_ids[reaction_id] = event.key
+        else:
+            self.pending[event.key] = PendingReaction(None, event.seq)
+            self.pending_ids.pop(reaction_id, None)
+        if self._queue.qsize() >= self.batch_size:
+            self._full.set()
+
+    async def run(self) -> None:
+        stopping = False
+        while not (stopping and self._queue.empty()):
+            batch = await self._next_batch()
+            if None in batch:
+                stopping = True
+                batch = [event for event in batch if event is not None]
+            if batch:
+                await self.flush(batch)
+
+    async def _next_batch(self) -> list[Optional[ReactionEvent]]:
+        """Набрать пачку: до batch_size событий или то, что пришло за flush_interval."""
+        batch = [await self._queue.get()]
+        if not self.closed and self._queue.qsize() + 1 < self.batch_size:
+            self._full.clear()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def flush(self, batch: list[ReactionEvent]) -> None:
+        """Записать пачку в одной транзакции.
+
+        Лайк и его отмена внутри одной пачки взаимно уничтожаются и в БД не попадают.
+        Если пачку не удалось записать из-за нарушения ключей, она пишется заново
+        по постам, каждый в своей транзакции, и теряются только события постов,
+        которые записать так и не удалось. После ошибок соединения запись
+        повторяется до FLUSH_ATTEMPTS раз.
+        """
+        touched, deltas = set(), {}
+        try:
+            touched, deltas = await self._write_with_retry(batch)
+            self.flushed += len(batch)
+        except IntegrityError:
+            logger.warning("Пачка реакций нарушила ключи, запись по постам: %d событий", len(batch))
+            for post_batch in split_by_post(batch):
+                try:
+                    post_touched, post_deltas = await self._write_with_retry(post_batch)
+                except Exception:
+                    self._drop(post_batch)
+                    continue
+                touched.update(post_touched)
+                deltas.update(post_deltas)
+                self.flushed += len(post_batch)
+        except Exception:
+            self._drop(batch)
+        finally:
+            self._forget(batch)
+        # Ошибка кеша не должна останавливать задачу записи.
+        try:
+            await get_posts_cache().invalidate(*touched)
+        except Exception:
+            logger.exception("Не удалось сбросить кеш постов после записи реакций")
+        await get_live_counters().publish(deltas)
+
+    async def _write_with_retry(self, batch: list[ReactionEvent]) -> tuple[set[UUID], dict]:
+        delay = FLUSH_RETRY_DELAY
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                return await self._write(batch)
+            except IntegrityError:
+                raise
+            except TRANSIENT_ERRORS:
+                if attempt == FLUSH_ATTEMPTS:
+                    raise
+                self.retried += 1
+                logger.warning(
+                    "Не удалось записать пачку реакций, повтор через %.1f с", delay, exc_info=True
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _write(self, batch: list[ReactionEvent]) -> tuple[set[UUID], dict]:
+        """Записать события одной транзакцией, вернет затронутые посты и дельты счетчиков."""
+        created: dict[ReactionKey, ReactionEvent] = {}
+        deleted: defaultdict[ReactionType, set[UUID]] = defaultdict(set)
+        for event in batch:
+            if event.action is ReactionAction.create:
+                created[event.key] = event
+            elif event.key in created and created[event.key].id == event.id:
+                del created[event.key]
+            else:
+                deleted[event.reaction].add(event.id)
+        inserted: defaultdict[ReactionType, list[dict]] = defaultdict(list)
+        for event in created.values():
+            inserted[event.reaction].append(
+                dict(id=event.id, post_id=event.post_id, user_id=event.user_id)
+            )
+        async with async_session() as session:
+            likes_service = LikesService(session)
+            dislikes_service = DislikesService(session)
+            likes_removed = await likes_service.delete_likes_by_id(deleted[ReactionType.like])
+            dislikes_removed = await dislikes_service.delete_dislikes_by_id(deleted[ReactionType.dislike])
+            likes_added = await likes_service.insert_likes(inserted[ReactionType.like])
+            dislikes_added = await dislikes_service.insert_dislikes(inserted[ReactionType.dislike])
+            await session.commit()
+        touched = {*likes_removed, *dislikes_removed, *likes_added, *dislikes_added}
+        return touched, counts_deltas(likes_added, likes_removed, dislikes_added, dislikes_removed)
+
+    def _drop(self, batch: list[ReactionEvent]) -> None:
+        self.dropped += len(batch)
+        logger.exception("Не удалось записать пачку реакций, потеряно событий: %d", len(batch))
+
+    def _forget(self, batch: list[ReactionEvent]) -> None:
+        """Убрать из pending то, что больше не изменялось после записанной пачки."""
+        last_seq = batch[-1].seq
+        for event in batch:
+            pending = self.pending.get(event.key)
+            if pending is not None and pending.seq <= last_seq:
+                del self.pending[event.key]
+            if event.key not in self.pending:
+                self.pending_ids.pop(event.id, None)
+
+
+def split_by_post(batch: list[ReactionEvent]) -> list[list[ReactionEvent]]:
+    """Разбить пачку на пачки по постам, сохранив порядок событий."""
+    posts: dict[UUID, list[ReactionEvent]] = {}
+    for event in batch:
+        posts.setdefault(event.post_id, []).append(event)
+    return list(posts.values())
+
+
+@lru_cache()
+def get_reactions_buffer() -> ReactionsBuffer:
+    return ReactionsBuffer(
+        settings.REACTIONS_QUEUE_SIZE, settings.REACTIONS_BATCH_SIZE, settings.REACTIONS_FLUSH_INTERVAL
+    )
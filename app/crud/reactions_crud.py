@@ -0,0 +1,242 @@
+import uuid
+from typing import Iterable, Optional
+
+from fastapi import Depends
+from pydantic.schema import UUID
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from app.api.request_models.reactions import ReactionAction, ReactionItemRequest, ReactionType
+from app.api.response_models.reactions import ReactionStatus
+from app.core.cache import get_posts_cache
+from app.core.db.models import Dislikes, Likes, Posts
+from app.core.live import counts_deltas, get_live_counters
+from app.crud.dislikes_crud import DislikesService, get_dislikes_service
+from app.crud.likes_crud import LikesService, get_likes_service
+from app.crud.reactions_buffer import get_reactions_buffer
+
+OPPOSITE = {
+    ReactionType.like: ReactionType.dislike,
+    ReactionType.dislike: ReactionType.like,
+}
+
+
+def plan_items(
+    items: list[ReactionItemRequest],
+    user_id: UUID,
+    owners: dict[UUID, UUID],
+    initial: dict[ReactionType, dict[UUID, UUID]],
+) -> tuple[list[dict], dict, dict, list[tuple]]:
+    """Проверить элементы пакета по порядку на состоянии initial.
+
+    Вернет результаты элементов, итоговое состояние, результат последнего
+    создания по (реакция, пост) и события успешных элементов по порядку:
+    (действие, реакция, id, post_id).
+    """
+    state = {reaction: dict(ids) for reaction, ids in initial.items()}
+    last_created = {}
+    results, events = [], []
+    for item in items:
+        current = state[item.reaction]
+        result = dict(item, id=current.get(item.post_id))
+        if item.post_id not in owners:
+            result["status"] = ReactionStatus.not_found
+        elif item.action is ReactionAction.create:
+            if (
+                owners[item.post_id] == user_id
+                or item.post_id in current
+                or item.post_id in state[OPPOSITE[item.reaction]]
+            ):
+                result["status"] = ReactionStatus.forbidden
+            else:
+                # Удаление и повторное создание в одном пакете взаимно
+                # сокращаются: в БД остается прежняя реакция из initial.
+                current[item.post_id] = initial[item.reaction].get(item.post_id) or uuid.uuid4()
+                result.update(id=current[item.post_id], status=ReactionStatus.created)
+                last_created[item.reaction, item.post_id] = result
+        elif item.post_id not in current:
+            result["status"] = ReactionStatus.not_found
+        else:
+            del current[item.post_id]
+            result["status"] = ReactionStatus.deleted
+        if result["status"] in (ReactionStatus.created, ReactionStatus.deleted):
+            events.append((item.action, item.reaction, result["id"], item.post_id))
+        results.append(result)
+    return results, state, last_created, events
+
+
+class ReactionsService:
+    def __init__(self, likes_service: LikesService, dislikes_service: DislikesService) -> None:
+        self.likes_service = likes_service
+        self.dislikes_service = dislikes_service
+        self.session = likes_service.session
+
+    async def get_posts_owners(self, post_ids: Iterable[UUID]) -> dict[UUID, UUID]:
+        """Получить авторов набора постов: {post_id: user_id}."""
+        posts = await self.session.execute(
+            select(Posts.id, Posts.user_id).where(Posts.id.in_(list(post_ids)))
+        )
+        return dict(posts.all())
+
+    async def get_initial_state(
+        self,
+        items: list[ReactionItemRequest],
+        user_id: UUID
+    ) -> tuple[dict[UUID, UUID], dict[ReactionType, dict[UUID, UUID]]]:
+        """Авторы постов пакета и реакции пользователя к ним в БД: тремя запросами."""
+        owners = await self.get_posts_owners({item.post_id for item in items})
+        initial = {
+            ReactionType.like: await self.likes_service.get_user_likes(owners, user_id),
+            ReactionType.dislike: await self.dislikes_service.get_user_dislikes(owners, user_id),
+        }
+        return owners, initial
+
+    async def apply(
+        self,
+        items: list[ReactionItemRequest],
+        user_id: UUID
+    ) -> list[dict]:
+        """Применить пакет реакций пользователя в одной транзакции.
+
+        Элементы проверяются по порядку на состоянии, загруженном тремя
+        запросами по всему набору постов, в базу пишется только итоговая
+        разница: один DELETE и один INSERT на тип реакции. id новых реакций
+        выдаются сразу, поэтому созданная и удаленная в одном пакете реакция
+        отчитывается одним id в обоих элементах.
+        """
+        owners, initial = await self.get_initial_state(items, user_id)
+        results, state, last_created, _ = plan_items(items, user_id, owners, initial)
+        removed = {
+            reaction: initial[reaction].keys() - state[reaction].keys() for reaction in state
+        }
+        added = {
+            reaction: state[reaction].keys() - initial[reaction].keys() for reaction in state
+        }
+        deleted = {
+            ReactionType.like: await self.likes_service.delete_user_likes(
+                removed[ReactionType.like], user_id
+            ),
+            ReactionType.dislike: await self.dislikes_service.delete_user_dislikes(
+                removed[ReactionType.dislike], user_id
+            ),
+        }
+        created = {
+            ReactionType.like: await self.likes_service.create_likes(
+                added[ReactionType.like], user_id, state[ReactionType.like]
+            ),
+            ReactionType.dislike: await self.dislikes_service.create_dislikes(
+                added[ReactionType.dislike], user_id, state[ReactionType.dislike]
+            ),
+        }
+        await self.session.commit()
+        await get_posts_cache().invalidate(*set().union(*removed.values(), *added.values()))
+        await get_live_counters().publish(counts_deltas(
+            likes_added=created[ReactionType.like],
+            likes_removed=deleted[ReactionType.like],
+            dislikes_added=created[ReactionType.dislike],
+            dislikes_removed=deleted[ReactionType.dislike],
+        ))
+        # Реакцию, которую успел создать параллельный запрос, INSERT пропустил.
+        for reaction in added:
+            for post_id in added[reaction] - created[reaction].keys():
+                last_created[reaction, post_id].update(id=None, status=ReactionStatus.forbidden)
+        return results
+
+    async def get_reaction_state(self, post_id: UUID, user_id: UUID) -> Optional[Row]:
+        """Получить автора поста и id лайка и дизлайка пользователя к нему одним запросом."""
+        state = await self.session.execute(
+            select(
+                Posts.user_id,
+                select(Likes.id).where(Likes.post_id == post_id, Likes.user_id == user_id)
+                .scalar_subquery().label("like_id"),
+                select(Dislikes.id).where(Dislikes.post_id == post_id, Dislikes.user_id == user_id)
+                .scalar_subquery().label("dislike_id"),
+            ).where(Posts.id == post_id)
+        )
+        return state.first()
+
+    async def queue_create(
+        self,
+        reaction: ReactionType,
+        post_id: UUID,
+        user_id: UUID
+    ) -> tuple[ReactionStatus, Optional[UUID]]:
+        """Проверить и поставить реакцию в буфер отложенной записи.
+
+        Учитываются и БД, и еще не записанные события буфера.
+        Вернет статус и id новой реакции.
+        """
+        state = await self.get_reaction_state(post_id, user_id)
+        if state is None:
+            return ReactionStatus.not_found, None
+        if state.user_id == user_id:
+            return ReactionStatus.forbidden, None
+        buffer = get_reactions_buffer()
+        current = {ReactionType.like: state.like_id, ReactionType.dislike: state.dislike_id}
+        for kind in current:
+            pending = buffer.pending.get((kind, post_id, user_id))
+            if pending is not None:
+                current[kind] = pending.id
+        if any(current.values()):
+            return ReactionStatus.forbidden, None
+        reaction_id = uuid.uuid4()
+        await buffer.put(ReactionAction.create, reaction, reaction_id, post_id, user_id)
+        return ReactionStatus.created, reaction_id
+
+    async def queue_delete(
+        self,
+        reaction: ReactionType,
+        reaction_id: UUID,
+        user_id: UUID
+    ) -> ReactionStatus:
+        """Проверить и поставить удаление реакции в буфер отложенной записи."""
+        buffer = get_reactions_buffer()
+        key = buffer.pending_ids.get(reaction_id)
+        if key is None or key[0] is not reaction:
+            if reaction is ReactionType.like:
+                stored = await self.likes_service.get_like_by_id(reaction_id)
+            else:
+                stored = await self.dislikes_service.get_dislike_by_id(reaction_id)
+            if stored is None:
+                return ReactionStatus.not_found
+            key = (reaction, stored.post_id, stored.user_id)
+            pending = buffer.pending.get(key)
+            if pending is not None and pending.id != reaction_id:
+                return ReactionStatus.not_found
+        if key[2] != user_id:
+            return ReactionStatus.forbidden
+        await buffer.put(ReactionAction.delete, reaction, reaction_id, key[1], key[2])
+        return ReactionStatus.deleted
+
+    async def queue_apply(
+        self,
+        items: list[ReactionItemRequest],
+        user_id: UUID
+    ) -> list[dict]:
+        """Проверить пакет реакций так же, как apply, и поставить его в буфер.
+
+        Состояние из БД дополняется еще не записанными событиями буфера,
+        события пакета ставятся в очередь по порядку элементов.
+        """
+        owners, initial = await self.get_initial_state(items, user_id)
+        buffer = get_reactions_buffer()
+        for reaction, ids in initial.items():
+            for post_id in owners:
+                pending = buffer.pending.get((reaction, post_id, user_id))
+                if pending is None:
+                    continue
+                if pending.id is None:
+                    ids.pop(post_id, None)
+                else:
+                    ids[post_id] = pending.id
+        results, _, _, events = plan_items(items, user_id, owners, initial)
+        for action, reaction, reaction_id, post_id in events:
+            await buffer.put(action, reaction, reaction_id, post_id, user_id)
+        return results
+
+
+async def get_reactions_service(
+    likes_service: LikesService = Depends(get_likes_service),
+    dislikes_service: DislikesService = Depends(get_dislikes_service),
+) -> ReactionsService:
+    return ReactionsService(likes_service, dislikes_service)
@@ -0,0 +1,64 @@
+"""Импорт постов из файла в обход HTTP.
+
+    python -m app.import_posts posts.ndjson --email author@example.com
+    python -m app.import_posts posts.csv --email author@example.com --chunk-size 5000
+
+Формат определяется по расширению файла (.csv, иначе NDJSON), файл читается
+потоком. Отчет печатается по каждой пачке, код возврата 1, если хотя бы одна
+строка отклонена.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from sqlalchemy import func, select
+
+from app.core.db.db import async_session, get_engine
+from app.core.db.models import User
+from app.crud.posts_crud import PostsService
+from app.crud.posts_import import IMPORT_CHUNK_SIZE, ImportFormat, PostsImporter
+
+READ_SIZE = 64 * 1024
+
+
+async def read_file(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as file:
+        while data := file.read(READ_SIZE):
+            yield data
+
+
+async def main(args) -> int:
+    import_format = ImportFormat.csv if args.path.suffix.lower() == ".csv" else ImportFormat.ndjson
+    async with async_session() as session:
+        user_id = (await session.execute(
+            select(User.id).where(func.lower(User.email) == args.email.lower())
+        )).scalar()
+        if user_id is None:
+            print(f"Пользователь {args.email} не найден", file=sys.stderr)
+            await get_engine().dispose()
+            return 2
+        importer = PostsImporter(PostsService(session), args.chunk_size)
+        inserted = rejected = 0
+        async for report in importer.run(read_file(args.path), import_format, user_id):
+            inserted += report.inserted
+            rejected += report.rejected
+            print(
+                f"пачка {report.chunk} (строки {report.first_line}-{report.last_line}): "
+                f"вставлено {report.inserted}, отклонено {report.rejected}"
+            )
+            for error in report.errors:
+                print(f"    строка {error['line'] or '-'}: {error['error']}")
+    await get_engine().dispose()
+    print(f"всего вставлено {inserted}, отклонено {rejected}")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="файл NDJSON или CSV")
+    parser.add_argument("--email", required=True, help="автор импортируемых постов")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,214 @@
+"""Запуск приложения в нескольких процессах.
+
+    python -m app.server [--workers N] [--host 0.0.0.0] [--port 8080]
+
+Супервизор открывает сокет и запускает --workers процессов uvicorn
+(по умолчанию по числу CPU) с циклом событий uvloop и парсером httptools,
+если они установлены. Упавший воркер перезапускается.
+
+SIGHUP - плавный перезапуск: супервизор перечитывает настройки, и воркеры
+по одному заменяются новыми, с заново импортированным кодом; старый получает
+SIGTERM только после того, как новый закончил startup. SIGTERM и SIGINT - плавная
+остановка: воркеры дорабатывают начатые запросы, а не успевшие
+за --graceful-timeout завершаются принудительно.
+
+Пул соединений каждого воркера урезается так, чтобы все воркеры вместе,
+включая лишний воркер на время замены, держали не больше DB_MAX_CONNECTIONS
+соединений с каждой базой. Рейтинг
+популярных постов обновляет только воркер 0.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from importlib.util import find_spec
+from typing import Optional
+
+import uvicorn
+
+from app.core.settings import get_settings, settings
+
+logger = logging.getLogger("uvicorn.error")
+
+APP = "app.application:create_app"
+SUPERVISE_INTERVAL = 0.5
+
+
+def pick_loop() -> str:
+    return "uvloop" if find_spec("uvloop") is not None else "asyncio"
+
+
+def pick_http() -> str:
+    return "httptools" if find_spec("httptools") is not None else "h11"
+
+
+def worker_pool_limits(
+    max_connections: int, workers: int, pool_size: int, max_overflow: int
+) -> tuple[int, int]:
+    """DB_POOL_SIZE и DB_MAX_OVERFLOW воркера, чтобы workers воркеров и еще
+    один, запущенный при плавном перезапуске, не открыли больше max_connections
+    соединений."""
+    per_worker = max_connections // (workers + 1)
+    if per_worker < 1:
+        raise ValueError(
+            f"DB_MAX_CONNECTIONS={max_connections} не хватает на {workers} воркеров и еще один"
+        )
+    pool_size = min(pool_size, per_worker)
+    return pool_size, min(max_overflow, per_worker - pool_size)
+
+
+def worker_env(workers: int) -> dict:
+    """Переменные окружения воркеров, вычисляемые из текущих настроек."""
+    pool_size, max_overflow = worker_pool_limits(
+        settings.DB_MAX_CONNECTIONS, workers, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    )
+    return {"DB_POOL_SIZE": str(pool_size), "DB_MAX_OVERFLOW": str(max_overflow)}
+
+
+class WorkerServer(uvicorn.Server):
+    """Сервер воркера, сообщающий супервизору о завершении startup."""
+
+    def __init__(self, config: uvicorn.Config, ready) -> None:
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets: Optional[list] = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.ready.set()
+
+
+def run_worker(config: uvicorn.Config, sockets: list[socket.socket], env: dict, ready) -> None:
+    os.environ.update(env)
+    config.configure_logging()
+    WorkerServer(config, ready).run(sockets=sockets)
+
+
+class Supervisor:
+    """Запускает воркеры на общем сокете и следит за ними."""
+
+    def __init__(
+        self, config: uvicorn.Config, workers: int, graceful_timeout: float, env: dict
+    ) -> None:
+        self.config = config
+        self.workers_count = workers
+        self.graceful_timeout = graceful_timeout
+        self.env = env
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: dict[int, multiprocessing.Process] = {}
+        # Событие должно жить, пока воркер его не получил, иначе семафор удаляется.
+        self.ready: dict[int, object] = {}
+        self.socket: Optional[socket.socket] = None
+        self.should_exit = False
+        self.should_reload = False
+
+    def handle_exit(self, sig, frame) -> None:
+        self.should_exit = True
+
+    def handle_reload(self, sig, frame) -> None:
+        self.should_reload = True
+
+    def spawn(self, index: int):
+        """Запустить воркер index, вернет процесс и событие его готовности."""
+        env = dict(self.env)
+        if index != 0:
+            env["TRENDING_REFRESH_INTERVAL"] = "0"
+        ready = self.context.Event()
+        process = self.context.Process(
+            target=run_worker,
+            kwargs=dict(config=self.config, sockets=[self.socket], env=env, ready=ready),
+            name=f"worker-{index}",
+        )
+        process.start()
+        return process, ready
+
+    def stop(self, *processes: multiprocessing.Process) -> None:
+        """SIGTERM, ожидание до graceful_timeout, затем SIGKILL."""
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + self.graceful_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Воркер %s не завершился за %.0f с", process.pid, self.graceful_timeout)
+                process.kill()
+                process.join()
+
+    def reload(self) -> None:
+        """Перечитать настройки и заменить воркеры по одному, не закрывая сокет."""
+        get_settings.cache_clear()
+        try:
+            self.env = worker_env(self.workers_count)
+        except ValueError:
+            logger.exception("Новые настройки не подходят, перезапуск отменен")
+            return
+        logger.info("Плавный перезапуск %d воркеров, окружение: %s", len(self.workers), self.env)
+        for index, old in list(self.workers.items()):
+            new, ready = self.spawn(index)
+            while not ready.wait(SUPERVISE_INTERVAL):
+                if not new.is_alive() or self.should_exit:
+                    break
+            if not ready.is_set():
+                logger.error("Новый воркер %d не запустился, перезапуск прерван", index)
+                self.stop(new)
+                return
+            self.workers[index], self.ready[index] = new, ready
+            self.stop(old)
+
+    def run(self) -> None:
+        self.socket = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        for index in range(self.workers_count):
+            self.workers[index], self.ready[index] = self.spawn(index)
+        while not self.should_exit:
+            time.sleep(SUPERVISE_INTERVAL)
+            if self.should_reload:
+                self.should_reload = False
+                self.reload()
+            for index, process in list(self.workers.items()):
+                if not self.should_exit and not process.is_alive():
+                    logger.warning("Воркер %d завершился с кодом %s, запускаю заново", index, process.exitcode)
+                    self.workers[index], self.ready[index] = self.spawn(index)
+        logger.info("Остановка %d воркеров", len(self.workers))
+        self.stop(*self.workers.values())
+        self.socket.close()
+
+
+def main(args) -> None:
+    env = worker_env(args.workers)
+    config = uvicorn.Config(
+        APP,
+        factory=True,
+        host=args.host,
+        port=args.port,
+        loop=pick_loop(),
+        http=pick_http(),
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+    )
+    logger.info(
+        "%d воркеров, loop=%s, http=%s, пул БД на воркер: %d + %d",
+        args.workers, config.loop, config.http, int(env["DB_POOL_SIZE"]), int(env["DB_MAX_OVERFLOW"]),
+    )
+    if args.workers > 1:
+        for name in ("CACHE_BACKEND", "LIVE_BROKER"):
+            if getattr(settings, name) == "memory":
+                logger.warning("%s=memory: у каждого воркера своя копия, нужен redis", name)
+    Supervisor(config, args.workers, args.graceful_timeout, env).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--graceful-timeout", type=float, default=30, help="сек")
+    parser.add_argument(
+        "--forwarded-allow-ips", default="127.0.0.1", help="прокси, которым доверять X-Forwarded-*"
+    )
+    main(parser.parse_args())
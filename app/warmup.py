@@ -0,0 +1,111 @@
+"""Прогрев процесса перед приемом запросов.
+
+Без него первые запросы после выкладки открывают соединения с БД,
+настраивают мапперы и компилируют SQL, и это видно как всплеск p99.
+Прогрев открывает соединения пула, настраивает мапперы и выполняет
+запросы сервисов на чтение, чтобы они попали в кеш компиляции
+SQLAlchemy и в кеш подготовленных выражений asyncpg. Изменяющие запросы
+не выполняются. Ошибки прогрева только логируются: процесс стартует
+так же, как без него.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Callable
+
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import QueuePool
+
+from app.api.fields import POST_INCLUDES
+from app.core.cache import get_posts_cache
+from app.core.db.db import async_session, get_engine
+from app.core.db.models import Posts, User
+from app.core.db.replicas import get_replica_set
+from app.crud.dislikes_crud import DislikesService
+from app.crud.likes_crud import LikesService
+from app.crud.posts_crud import PostsService
+from app.crud.rankings_crud import RankingsService
+from app.crud.reactions_crud import ReactionsService
+
+logger = logging.getLogger(__name__)
+
+
+async def open_connections(engine: AsyncEngine) -> int:
+    """Открыть все постоянные соединения пула, вернет число открытых."""
+    pool = engine.pool
+    count = pool.size() if isinstance(pool, QueuePool) else 1
+    connections = await asyncio.gather(
+        *(engine.connect().start() for _ in range(count)), return_exceptions=True
+    )
+    opened = 0
+    for connection in connections:
+        if isinstance(connection, BaseException):
+            logger.warning("Прогрев: не удалось открыть соединение с %s: %r", engine.url.host, connection)
+            continue
+        opened += 1
+        await connection.close()
+    return opened
+
+
+async def compile_queries(session_factory: Callable[[], AsyncSession]) -> None:
+    """Выполнить запросы сервисов на чтение в том виде, в каком их строят обработчики.
+
+    Кеш компиляции у каждого движка свой, поэтому прогревается каждая база.
+    """
+    missing = uuid.uuid4()
+    async with session_factory() as session:
+        posts_service = PostsService(session)
+        post_id = (await session.execute(select(Posts.id).limit(1))).scalar() or missing
+        after = (datetime.min, missing)
+        await posts_service.get_post(post_id)
+        await posts_service.get_post_version(post_id)
+        await posts_service.get_post_owner(post_id)
+        await posts_service.get_posts_reactions([post_id], POST_INCLUDES)
+        for page_after in (None, after):
+            await posts_service.get_all_post(1, page_after)
+            await posts_service.get_all_post_versions(1, page_after)
+            await posts_service.get_author_posts(missing, 1, page_after)
+            await posts_service.get_all_post_versions(1, page_after, missing)
+        await posts_service.search_posts("warmup", 1)
+        await posts_service.search_posts("warmup", 1, (0.0, missing))
+
+        likes_service = LikesService(session)
+        dislikes_service = DislikesService(session)
+        await likes_service.get_like(post_id, missing)
+        await likes_service.get_like_by_id(missing)
+        await likes_service.get_dislike_to_check(post_id, missing)
+        await dislikes_service.get_dislike(post_id, missing)
+        await dislikes_service.get_dislike_by_id(missing)
+        await dislikes_service.get_like_to_check(post_id, missing)
+        reactions_service = ReactionsService(likes_service, dislikes_service)
+        await reactions_service.get_reaction_state(post_id, missing)
+        await reactions_service.get_posts_owners([post_id])
+
+        await RankingsService(session).get_top_posts(1)
+        user_db = SQLAlchemyUserDatabase(session, User)
+        await user_db.get(missing)
+        await user_db.get_by_email("warmup@localhost")
+
+
+async def warm_up() -> None:
+    started = time.perf_counter()
+    configure_mappers()
+    get_posts_cache()
+    databases = [(get_engine(), async_session)] + [
+        (replica.engine, replica.sessionmaker) for replica in get_replica_set().replicas
+    ]
+    opened = 0
+    for engine, session_factory in databases:
+        try:
+            opened += await open_connections(engine)
+            await compile_queries(session_factory)
+        except Exception:
+            logger.exception("Прогрев %s не завершен", engine.url.host or engine.url.database)
+    logger.info(
+        "Прогрев: %d соединений, %.0f мс", opened, (time.perf_counter() - started) * 1000
+    )
@@ -0,0 +1,44 @@
+"""Сколько SQL-запросов на запрос остается после кеша пользователей.
+
+    python -m benchmarks.auth_cache [--requests 200]
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import ASGIClient, QueryCounter, create_bench_app
+from app.core.cache import get_users_cache
+from app.core.db.db import get_engine
+
+
+async def measure(client: ASGIClient, counter: QueryCounter, headers: dict, requests: int, cached: bool) -> float:
+    users_cache = get_users_cache()
+    users_cache.clear()
+    counter.count = 0
+    for _ in range(requests):
+        if not cached:
+            users_cache.clear()
+        status, body = await client.request("GET", "/posts/?limit=10", headers=headers)
+        assert status == 200, body
+    return counter.count / requests
+
+
+async def main(requests: int) -> None:
+    app = await create_bench_app()
+    client = ASGIClient(app)
+    headers = await client.register_and_login("bench@example.com")
+    await client.request("POST", "/posts/", headers=headers, json_body={"title": "t", "description": "d"})
+    counter = QueryCounter(get_engine())
+
+    without_cache = await measure(client, counter, headers, requests, cached=False)
+    with_cache = await measure(client, counter, headers, requests, cached=True)
+    print(f"GET /posts/, {requests} запросов")
+    print(f"  без кеша пользователей: {without_cache:.2f} SQL-запросов на запрос")
+    print(f"  с кешем пользователей:  {with_cache:.2f} SQL-запросов на запрос")
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,238 @@
+"""Проверка планов запросов: ни один запрос сервисов не должен читать большую таблицу целиком.
+
+    python -m benchmarks.explain [--users 2000] [--posts 20000] [--reactions 100000] [--verbose]
+
+Заполняет базу из DATABASE_URL, выполняет методы сервисов из app/crud,
+перехватывает все их SQL-запросы (включая selectin-загрузки) и прогоняет
+каждый через EXPLAIN. Код возврата 1, если хотя бы один план содержит
+последовательное сканирование одной из LARGE_TABLES.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from benchmarks.common import create_bench_app
+from benchmarks.run import SEED_CHUNK, seed
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.request_models.posts import PostsCreateAndUpdateRequest
+from app.api.request_models.reactions import ReactionAction, ReactionItemRequest, ReactionType
+from app.core.db.db import async_session, get_engine
+from app.core.db.models import Dislikes, User
+from app.crud.dislikes_crud import DislikesService
+from app.crud.likes_crud import LikesService
+from app.crud.posts_crud import PostsService, posts_columns
+from app.crud.rankings_crud import RankingsService
+from app.crud.reactions_crud import ReactionsService
+
+LARGE_TABLES = {"posts", "likes", "dislikes", "users", "post_rankings"}
+
+Scenario = Callable[[AsyncSession], Awaitable]
+
+
+class StatementRecorder:
+    """Собирает SQL-запросы, выполненные движком, с подписью текущего сценария."""
+
+    def __init__(self) -> None:
+        self.label = None
+        self.statements: dict[str, tuple[str, object]] = {}
+        event.listen(get_engine().sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is not None and not executemany and statement.lstrip().upper().startswith(
+            ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+        ):
+            self.statements.setdefault(statement, (self.label, parameters))
+
+
+def make_scenarios(user_ids: list[uuid.UUID], post_ids: list[uuid.UUID]) -> dict[str, Scenario]:
+    user_id, other_id = user_ids[0], user_ids[1]
+    post_id = random.choice(post_ids)
+    some_posts = random.sample(post_ids, 20)
+
+    async def posts_pages(session):
+        service = PostsService(session)
+        page = await service.get_all_post(21)
+        after = (page[-1].created_at, page[-1].id)
+        await service.get_all_post(21, after)
+        await service.get_posts_reactions([post.id for post in page], ("likes", "dislikes"))
+        await service.get_all_post(21, after, posts_columns(("id", "title")))
+        await service.get_all_post_versions(21, after)
+        author_page = await service.get_author_posts(user_id, 21)
+        if author_page:
+            author_after = (author_page[-1].created_at, author_page[-1].id)
+            await service.get_author_posts(user_id, 21, author_after)
+            await service.get_all_post_versions(21, author_after, user_id)
+
+    async def posts_single(session):
+        service = PostsService(session)
+        await service.get_post(post_id)
+        await service.get_post_version(post_id)
+        await service.search_posts("post", 21)
+
+    async def posts_export(session):
+        async for _ in PostsService(session).stream_posts(post_ids[0], 100):
+            break
+
+    async def posts_write(session):
+        service = PostsService(session)
+        data = PostsCreateAndUpdateRequest(title="explain", description="explain")
+        post = await service.create_post(data, user_id)
+        await service.update_post(post.id, data)
+        await service.delete_post(post.id)
+
+    async def likes(session):
+        service = LikesService(session)
+        await service.get_post_to_check(post_id)
+        await service.get_like(post_id, other_id)
+        await service.get_dislike_to_check(post_id, other_id)
+        like = await service.create_like(post_id, other_id)
+        if like is not None:
+            await service.get_like_by_id(like.id)
+            await service.delete_like(like.id)
+
+    async def dislikes(session):
+        service = DislikesService(session)
+        await service.get_post_to_check(post_id)
+        await service.get_dislike(post_id, other_id)
+        await service.get_like_to_check(post_id, other_id)
+        dislike = await service.create_dislike(post_id, other_id)
+        if dislike is not None:
+            await service.get_dislike_by_id(dislike.id)
+            await service.delete_dislike(dislike.id)
+
+    async def likes_bulk(session):
+        service = LikesService(session)
+        await service.get_user_likes(some_posts, other_id)
+        await service.create_likes(some_posts, other_id)
+        await service.delete_user_likes(some_posts, other_id)
+        await service.insert_likes([dict(id=uuid.uuid4(), post_id=post_id, user_id=other_id)])
+        await service.delete_likes_by_id([uuid.uuid4()])
+        await session.rollback()
+
+    async def dislikes_bulk(session):
+        service = DislikesService(session)
+        await service.get_user_dislikes(some_posts, other_id)
+        await service.create_dislikes(some_posts, other_id)
+        await service.delete_user_dislikes(some_posts, other_id)
+        await service.insert_dislikes([dict(id=uuid.uuid4(), post_id=post_id, user_id=other_id)])
+        await service.delete_dislikes_by_id([uuid.uuid4()])
+        await session.rollback()
+
+    async def reactions(session):
+        service = ReactionsService(LikesService(session), DislikesService(session))
+        await service.get_reaction_state(post_id, other_id)
+        await service.apply([
+            ReactionItemRequest(post_id=post, reaction=ReactionType.like, action=ReactionAction.create)
+            for post in some_posts
+        ], other_id)
+
+    async def rankings(session):
+        service = RankingsService(session)
+        await service.refresh(datetime.utcnow())
+        await service.get_top_posts(20)
+
+    async def users(session):
+        user_db = SQLAlchemyUserDatabase(session, User)
+        await user_db.get(user_id)
+        await user_db.get_by_email("user1@bench.local")
+
+    return {
+        "posts: pages": posts_pages,
+        "posts: single": posts_single,
+        "posts: export": posts_export,
+        "posts: write": posts_write,
+        "likes": likes,
+        "dislikes": dislikes,
+        "likes: bulk": likes_bulk,
+        "dislikes: bulk": dislikes_bulk,
+        "reactions": reactions,
+        "rankings": rankings,
+        "users": users,
+    }
+
+
+def sequential_scans(dialect: str, plan) -> list[str]:
+    """Большие таблицы, которые план читает целиком."""
+    if dialect == "sqlite":
+        found = []
+        for *_, detail in plan:
+            words = detail.split()
+            if words[:1] == ["SCAN"] and words[1] in LARGE_TABLES and "USING" not in words:
+                found.append(words[1])
+        return found
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+            yield node["Relation Name"]
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    return list(walk(plan[0][0][0]["Plan"]))
+
+
+async def explain(statement: str, parameters) -> list:
+    prefix = "EXPLAIN QUERY PLAN " if get_engine().dialect.name == "sqlite" else "EXPLAIN (FORMAT JSON) "
+    async with get_engine().connect() as connection:
+        plan = await connection.exec_driver_sql(prefix + statement, parameters)
+        rows = plan.all()
+    if get_engine().dialect.name != "sqlite" and isinstance(rows[0][0], str):
+        rows = [[json.loads(rows[0][0])]]
+    return rows
+
+
+async def seed_dislikes(user_ids: list[uuid.UUID], post_ids: list[uuid.UUID], count: int) -> None:
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((random.choice(post_ids), random.choice(user_ids)))
+    values = [dict(id=uuid.uuid4(), post_id=post_id, user_id=user_id) for post_id, user_id in pairs]
+    async with get_engine().begin() as connection:
+        for i in range(0, len(values), SEED_CHUNK):
+            await connection.execute(insert(Dislikes), values[i:i + SEED_CHUNK])
+
+
+async def main(args) -> int:
+    await create_bench_app()
+    user_ids, post_ids = await seed(args.users, args.posts, args.reactions)
+    await seed_dislikes(user_ids, post_ids, args.reactions // 2)
+    async with get_engine().begin() as connection:
+        await connection.exec_driver_sql("ANALYZE")
+    recorder = StatementRecorder()
+    for label, scenario in make_scenarios(user_ids, post_ids).items():
+        recorder.label = label
+        async with async_session() as session:
+            await scenario(session)
+        recorder.label = None
+
+    failures = 0
+    for statement, (label, parameters) in recorder.statements.items():
+        plan = await explain(statement, parameters)
+        scans = sequential_scans(get_engine().dialect.name, plan)
+        status = "SEQ SCAN " + ", ".join(scans) if scans else "ok"
+        failures += bool(scans)
+        print(f"[{status}] {label}: {' '.join(statement.split())[:150]}")
+        if args.verbose or scans:
+            for row in plan:
+                print("    ", row[-1] if get_engine().dialect.name == "sqlite" else json.dumps(row[0]))
+    print(f"\n{get_engine().dialect.name}: {len(recorder.statements)} запросов, с полным сканированием: {failures}")
+    await get_engine().dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--reactions", type=int, default=100000)
+    parser.add_argument("--verbose", action="store_true", help="печатать все планы")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    sys.exit(asyncio.run(main(args)))
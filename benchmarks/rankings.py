@@ -0,0 +1,100 @@
+"""Стоимость обновления рейтинга популярных постов.
+
+    python -m benchmarks.rankings [--posts 200000] [--reactions 5000000] [--changed 1000]
+
+Заполняет базу постами, на которые приходится --reactions реакций
+(в денормализованных счетчиках), и измеряет полный пересчет рейтинга,
+инкрементальный пересчет после изменения реакций у --changed постов
+и чтение топа. Пересчет читает только счетчики постов, поэтому его
+стоимость зависит от числа измененных постов, а не от числа реакций.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_bench_app
+from benchmarks.run import SEED_CHUNK, percentile
+from sqlalchemy import insert, update
+
+from app.core.db.db import async_session, get_engine
+from app.core.db.models import Posts, User
+from app.crud.rankings_crud import RankingsService
+
+
+async def seed(posts: int, reactions: int) -> list[uuid.UUID]:
+    user_id = uuid.uuid4()
+    post_ids = [uuid.uuid4() for _ in range(posts)]
+    started = datetime.utcnow() - timedelta(days=30)
+    # Распределение реакций с длинным хвостом, как у настоящей ленты.
+    weights = [random.paretovariate(1.2) for _ in range(posts)]
+    scale = reactions / sum(weights)
+    async with get_engine().begin() as connection:
+        await connection.execute(insert(User), [dict(
+            id=user_id, email="rankings@bench.local", hashed_password="-", name="bench", surname="bench",
+            is_active=True, is_superuser=False, is_verified=True,
+        )])
+        for offset in range(0, posts, SEED_CHUNK):
+            values = []
+            for i in range(offset, min(offset + SEED_CHUNK, posts)):
+                total = int(weights[i] * scale)
+                dislikes = int(total * random.random() * 0.3)
+                created_at = started + timedelta(seconds=i * 30 * 86400 // posts)
+                values.append(dict(
+                    id=post_ids[i], user_id=user_id, title=f"post {i}", description="bench",
+                    created_at=created_at, updated_at=created_at,
+                    likes_count=total - dislikes, dislikes_count=dislikes,
+                ))
+            await connection.execute(insert(Posts), values)
+    return post_ids
+
+
+async def main(args) -> None:
+    await create_bench_app()
+    post_ids = await seed(args.posts, args.reactions)
+    print(f"{get_engine().dialect.name}: {args.posts} постов, {args.reactions} реакций")
+
+    async with async_session() as session:
+        started = time.perf_counter()
+        refreshed, watermark = await RankingsService(session).refresh()
+        print(f"полный пересчет:        {refreshed:>8} постов за {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+    changed = random.sample(post_ids, args.changed)
+    async with get_engine().begin() as connection:
+        for i in range(0, len(changed), SEED_CHUNK):
+            await connection.execute(
+                update(Posts).where(Posts.id.in_(changed[i:i + SEED_CHUNK])).values(
+                    likes_count=Posts.likes_count + 1, version=Posts.version + 1
+                )
+            )
+
+    async with async_session() as session:
+        started = time.perf_counter()
+        refreshed, watermark = await RankingsService(session).refresh(watermark)
+        print(f"инкрементальный:        {refreshed:>8} постов за {(time.perf_counter() - started) * 1000:9.1f} ms")
+        started = time.perf_counter()
+        refreshed, watermark = await RankingsService(session).refresh(watermark)
+        print(f"без изменений:          {refreshed:>8} постов за {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+        latencies = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await RankingsService(session).get_top_posts(args.top)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"топ-{args.top}: p50={percentile(latencies, 50):.2f}ms p95={percentile(latencies, 95):.2f}ms")
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--reactions", type=int, default=5000000)
+    parser.add_argument("--changed", type=int, default=1000, help="постов с новыми реакциями")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args))
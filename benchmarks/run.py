@@ -0,0 +1,229 @@
+"""Нагрузочный прогон всех эндпоинтов на локальной базе.
+
+    python -m benchmarks.run --users 100 --posts 5000 --reactions 20000 \
+        --concurrency 20 --requests 500 --output results.json [--compare baseline.json]
+
+Для каждого сценария печатает p50/p95/p99, RPS и число SQL-запросов на запрос,
+результаты сохраняются в JSON для сравнения между прогонами.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from benchmarks.common import ASGIClient, QueryCounter, create_bench_app
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import insert
+
+from app.core.db.db import get_engine
+from app.core.db.models import Likes, Posts, User
+from app.core.db.user import get_jwt_strategy
+
+SEED_CHUNK = 1000
+
+
+async def seed(users: int, posts: int, reactions: int) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+    """Заполнить базу напрямую многострочными INSERT, минуя API."""
+    hashed_password = PasswordHelper().hash("bench-password")
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    post_ids = [uuid.uuid4() for _ in range(posts)]
+    owners = {post_id: random.choice(user_ids) for post_id in post_ids}
+    started = datetime.utcnow() - timedelta(days=30)
+    likes = set()
+    while len(likes) < min(reactions, posts * (users - 1)):
+        post_id, user_id = random.choice(post_ids), random.choice(user_ids)
+        if owners[post_id] != user_id:
+            likes.add((post_id, user_id))
+    likes_count = Counter(post_id for post_id, _ in likes)
+
+    rows = {
+        User: [
+            dict(
+                id=user_id, email=f"user{i}@bench.local", hashed_password=hashed_password,
+                name="bench", surname="bench", is_active=True, is_superuser=False, is_verified=True,
+            )
+            for i, user_id in enumerate(user_ids)
+        ],
+        Posts: [
+            dict(
+                id=post_id, title=f"post {i}", description="bench", user_id=owners[post_id],
+                created_at=started + timedelta(seconds=i), likes_count=likes_count[post_id],
+            )
+            for i, post_id in enumerate(post_ids)
+        ],
+        Likes: [dict(id=uuid.uuid4(), post_id=post_id, user_id=user_id) for post_id, user_id in likes],
+    }
+    async with get_engine().begin() as connection:
+        for model, values in rows.items():
+            for i in range(0, len(values), SEED_CHUNK):
+                await connection.execute(insert(model), values[i:i + SEED_CHUNK])
+    return user_ids, post_ids
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(
+    client: ASGIClient,
+    counter: QueryCounter,
+    requests: list,
+    concurrency: int,
+    on_response=None,
+) -> dict:
+    """Выполнить запросы сценария с заданной конкурентностью."""
+    queue = list(reversed(requests))
+    latencies = []
+    statuses = Counter()
+
+    async def worker():
+        while queue:
+            method, path, kwargs = queue.pop()
+            started = time.perf_counter()
+            status, body = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+            if on_response is not None:
+                on_response(kwargs, status, body)
+
+    counter.count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(requests),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(len(requests) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_per_request": round(counter.count / len(requests), 2),
+    }
+
+
+async def main(args) -> dict:
+    app = await create_bench_app()
+    client = ASGIClient(app)
+    user_ids, post_ids = await seed(args.users, args.posts, args.reactions)
+    strategy = get_jwt_strategy()
+    tokens = [
+        {"Authorization": f"Bearer {await strategy.write_token(User(id=user_id))}"}
+        for user_id in user_ids
+    ]
+    counter = QueryCounter(get_engine())
+    n = args.requests
+    run_id = uuid.uuid4().hex[:8]
+    created_posts = []
+
+    def auth():
+        return {"headers": random.choice(tokens)}
+
+    def remember_created(kwargs, status, body):
+        if status == 200:
+            created_posts.append((json.loads(body)["id"], kwargs["headers"]))
+
+    scenarios = {
+        "register": lambda: [
+            ("POST", "/auth/register", {"json_body": {
+                "email": f"new{run_id}{i}@bench.local", "password": "bench-password",
+                "name": "bench", "surname": "bench",
+            }})
+            for i in range(n)
+        ],
+        "login": lambda: [
+            ("POST", "/auth/jwt/login", {"form": {
+                "username": f"user{random.randrange(args.users)}@bench.local", "password": "bench-password",
+            }})
+            for _ in range(n)
+        ],
+        "list": lambda: [("GET", "/posts/?limit=20", auth()) for _ in range(n)],
+        "list_with_reactions": lambda: [
+            ("GET", "/posts/?limit=20&with_reactions=true", auth()) for _ in range(n)
+        ],
+        "get": lambda: [("GET", f"/posts/{random.choice(post_ids)}", auth()) for _ in range(n)],
+        "create": lambda: [
+            ("POST", "/posts/", {"json_body": {"title": "bench", "description": "bench"}, **auth()})
+            for _ in range(n)
+        ],
+        "like": lambda: [("POST", f"/likes/{random.choice(post_ids)}", auth()) for _ in range(n)],
+        "delete": lambda: [
+            ("DELETE", f"/posts/{post_id}", {"headers": headers}) for post_id, headers in created_posts
+        ],
+    }
+    selected = args.scenarios or list(scenarios)
+    results = {}
+    for name in selected:
+        if name == "delete" and not created_posts:
+            for _ in range(n):
+                headers = random.choice(tokens)
+                _, body = await client.request(
+                    "POST", "/posts/", headers=headers, json_body={"title": "bench", "description": "bench"}
+                )
+                created_posts.append((json.loads(body)["id"], headers))
+        results[name] = await run_scenario(
+            client, counter, scenarios[name](), args.concurrency,
+            remember_created if name == "create" else None,
+        )
+        print_result(name, results[name])
+    await get_engine().dispose()
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "dialect": get_engine().dialect.name,
+            "users": args.users,
+            "posts": args.posts,
+            "reactions": args.reactions,
+            "concurrency": args.concurrency,
+            "requests": n,
+        },
+        "scenarios": results,
+    }
+
+
+def print_result(name: str, result: dict) -> None:
+    print(
+        f"{name:<22} rps={result['rps']:>8} p50={result['p50_ms']:>8}ms "
+        f"p95={result['p95_ms']:>8}ms p99={result['p99_ms']:>8}ms "
+        f"sql/req={result['queries_per_request']:>5} codes={result['status_codes']}"
+    )
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Напечатать изменение RPS и p95 относительно прошлого прогона."""
+    print("\nСравнение с базовым прогоном:")
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        rps = (result["rps"] - base["rps"]) / base["rps"] * 100
+        p95 = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        print(f"{name:<22} rps {rps:+7.1f}%  p95 {p95:+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--reactions", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--scenarios", nargs="*", help="по умолчанию все")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON прошлого прогона")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    results = asyncio.run(main(args))
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
@@ -0,0 +1,102 @@
+"""Поиск постов: полнотекстовый индекс против LIKE '%q%'.
+
+    python -m benchmarks.search [--posts 1000000] [--queries 50] [--words 20000]
+
+Заполняет базу из DATABASE_URL случайными постами и сравнивает время первой
+страницы PostsService.search_posts с наивным сканированием по ILIKE.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_bench_app
+from benchmarks.run import SEED_CHUNK, percentile
+from sqlalchemy import insert, or_, select
+
+from app.core.db.db import async_session, get_engine
+from app.core.db.models import Posts, User
+from app.crud.posts_crud import POSTS_COUNTS_COLUMNS, PostsService
+
+ALPHABET = "абвгдежзиклмнопрстуфхцчшэюя"
+PAGE_SIZE = 20
+
+
+def make_vocabulary(size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(random.choices(ALPHABET, k=random.randint(4, 9))))
+    return list(words)
+
+
+async def seed(posts: int, vocabulary: list[str]) -> None:
+    user_id = uuid.uuid4()
+    started = datetime.utcnow() - timedelta(days=365)
+    async with get_engine().begin() as connection:
+        await connection.execute(insert(User), [dict(
+            id=user_id, email="search@bench.local", hashed_password="-", name="bench", surname="bench",
+            is_active=True, is_superuser=False, is_verified=True,
+        )])
+        for offset in range(0, posts, SEED_CHUNK):
+            await connection.execute(insert(Posts), [
+                dict(
+                    id=uuid.uuid4(), user_id=user_id,
+                    title=" ".join(random.choices(vocabulary, k=3))[:50],
+                    description=" ".join(random.choices(vocabulary, k=12))[:150],
+                    created_at=started + timedelta(seconds=offset + i),
+                )
+                for i in range(min(SEED_CHUNK, posts - offset))
+            ])
+
+
+async def naive_search(session, text: str, limit: int) -> list:
+    pattern = f"%{text}%"
+    found = await session.execute(
+        select(*POSTS_COUNTS_COLUMNS)
+        .where(or_(Posts.title.ilike(pattern), Posts.description.ilike(pattern)))
+        .order_by(Posts.created_at.desc(), Posts.id.desc())
+        .limit(limit)
+    )
+    return found.all()
+
+
+async def timed(function, queries: list[str]) -> tuple[list[float], int]:
+    latencies, matched = [], 0
+    async with async_session() as session:
+        for text in queries:
+            started = time.perf_counter()
+            matched += len(await function(session, text))
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, matched
+
+
+async def main(args) -> None:
+    await create_bench_app()
+    vocabulary = make_vocabulary(args.words)
+    started = time.perf_counter()
+    await seed(args.posts, vocabulary)
+    print(f"{get_engine().dialect.name}: {args.posts} постов за {time.perf_counter() - started:.1f} с")
+    queries = random.choices(vocabulary, k=args.queries)
+    for title, function in (
+        ("полнотекстовый", lambda session, text: PostsService(session).search_posts(text, PAGE_SIZE)),
+        ("LIKE '%q%'", lambda session, text: naive_search(session, text, PAGE_SIZE)),
+    ):
+        latencies, matched = await timed(function, queries)
+        print(
+            f"{title:<16} p50={percentile(latencies, 50):9.2f}ms p95={percentile(latencies, 95):9.2f}ms "
+            f"найдено в среднем {matched / len(queries):.1f} на страницу"
+        )
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--words", type=int, default=20000, help="размер словаря")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args))
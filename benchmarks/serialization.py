@@ -0,0 +1,94 @@
+"""CPU на сериализацию 1000 постов: response_model + JSONResponse против app.api.serializers.
+
+    python -m benchmarks.serialization [--posts 1000] [--reactions 5] [--repeat 20]
+
+Заодно проверяет, что оба пути дают одинаковые байты.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import namedtuple
+from typing import Optional
+
+import benchmarks.common  # noqa: F401
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.response_models.posts import PostsPageResponse
+from app.api.serializers import FastJSONResponse, posts_page_to_dict
+from app.core.db.models import Dislikes, Likes, Posts
+
+PostRow = namedtuple(
+    "PostRow", "id title description user_id created_at likes_count dislikes_count"
+)
+
+
+def make_posts(count: int, reactions: int) -> tuple[list, list, dict]:
+    """ORM-посты для response_model, строки и списки реакций для serializers."""
+    posts, rows, by_post = [], [], {"likes": {}, "dislikes": {}}
+    for i in range(count):
+        post_id, user_id = uuid.uuid4(), uuid.uuid4()
+        post = Posts(
+            id=post_id, title=f"Пост {i}", description="описание " * 10, user_id=user_id,
+            likes_count=reactions, dislikes_count=reactions,
+        )
+        post.likes = [Likes(id=uuid.uuid4(), post_id=post_id, user_id=uuid.uuid4()) for _ in range(reactions)]
+        post.dislikes = [
+            Dislikes(id=uuid.uuid4(), post_id=post_id, user_id=uuid.uuid4()) for _ in range(reactions)
+        ]
+        posts.append(post)
+        rows.append(PostRow(post_id, post.title, post.description, user_id, None, reactions, reactions))
+        by_post["likes"][post_id], by_post["dislikes"][post_id] = post.likes, post.dislikes
+    return posts, rows, by_post
+
+
+async def pydantic_path(field, items, next_cursor: str) -> bytes:
+    content = await serialize_response(
+        field=field,
+        response_content={"items": items, "next_cursor": next_cursor},
+        exclude_none=True,
+        is_coroutine=True,
+    )
+    return JSONResponse(content).body
+
+
+def fast_path(rows, next_cursor: str, reactions: Optional[dict]) -> bytes:
+    return FastJSONResponse(posts_page_to_dict(rows, next_cursor, reactions=reactions)).body
+
+
+def cpu_ms(function, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        function()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main(count: int, reactions: int, repeat: int) -> None:
+    field = create_response_field(name="bench", type_=PostsPageResponse)
+    posts, rows, by_post = make_posts(count, reactions)
+    loop = asyncio.new_event_loop()
+    for title, items, fast_reactions in (
+        ("счетчики (по умолчанию)", rows, None),
+        (f"include=likes,dislikes, {reactions}+{reactions} реакций на пост", posts, by_post),
+    ):
+        expected = loop.run_until_complete(pydantic_path(field, items, "cursor"))
+        assert fast_path(rows, "cursor", fast_reactions) == expected, "ответы различаются"
+        slow = cpu_ms(lambda: loop.run_until_complete(pydantic_path(field, items, "cursor")), repeat)
+        fast = cpu_ms(lambda: fast_path(rows, "cursor", fast_reactions), repeat)
+        per_1k = 1000 / count
+        print(f"{title}:")
+        print(f"  response_model: {slow * per_1k:8.2f} ms CPU на 1000 постов")
+        print(f"  serializers:    {fast * per_1k:8.2f} ms CPU на 1000 постов")
+        print(f"  экономия:       {(slow - fast) * per_1k:8.2f} ms ({(1 - fast / slow) * 100:.0f}%)")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--reactions", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.posts, args.reactions, args.repeat)
@@ -0,0 +1,92 @@
+"""Время старта процесса и первых запросов после него, с прогревом и без.
+
+    python -m benchmarks.startup [--runs 3]
+
+Готовит базу с пользователем и постом, затем для каждого режима запускает
+чистый интерпретатор, который замеряет импорт приложения, create_app,
+startup-обработчики (включая прогрев при DB_WARMUP) и задержку первого
+и второго вызова нескольких эндпоинтов. Печатаются медианы по --runs запускам.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ENDPOINTS = ("/posts/", "/posts/{post_id}", "/posts/author/{user_id}", "/posts/search?q=bench", "/posts/top")
+
+
+async def prepare() -> dict:
+    from benchmarks.common import ASGIClient, create_bench_app
+
+    app = await create_bench_app()
+    client = ASGIClient(app)
+    headers = await client.register_and_login("startup@bench.local")
+    status, body = await client.request(
+        "POST", "/posts/", headers=headers, json_body={"title": "bench", "description": "bench"}
+    )
+    post = json.loads(body)
+    return {"headers": headers, "post_id": post["id"], "user_id": post["user_id"]}
+
+
+async def child(context: dict) -> dict:
+    started = time.perf_counter()
+    from app.application import create_app
+    timings = {"import": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    app = create_app()
+    timings["create_app"] = time.perf_counter() - started
+
+    from benchmarks.common import ASGIClient
+    started = time.perf_counter()
+    await app.router.startup()
+    timings["startup"] = time.perf_counter() - started
+
+    client = ASGIClient(app)
+    for endpoint in ENDPOINTS:
+        path = endpoint.format(**context)
+        for attempt in ("first", "second"):
+            started = time.perf_counter()
+            status, body = await client.request("GET", path, headers=context["headers"])
+            timings[f"{endpoint} {attempt}"] = time.perf_counter() - started
+            assert status == 200, body
+    await app.router.shutdown()
+    return timings
+
+
+def run_child(context: dict, warmup: bool) -> dict:
+    env = {**os.environ, "DB_WARMUP": str(warmup), "TRENDING_REFRESH_INTERVAL": "0"}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", json.dumps(context)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(args) -> None:
+    if args.child:
+        # Окружение для Settings наследуется от родителя, импортировавшего benchmarks.common.
+        print(json.dumps(asyncio.run(child(json.loads(args.child)))))
+        return
+    context = asyncio.run(prepare())
+    results = {
+        warmup: [run_child(context, warmup) for _ in range(args.runs)]
+        for warmup in (False, True)
+    }
+    print(f"{'':<34}{'без прогрева':>14}{'с прогревом':>14}")
+    for name in results[False][0]:
+        medians = [
+            statistics.median(run[name] for run in results[warmup]) * 1000 for warmup in (False, True)
+        ]
+        print(f"{name:<34}{medians[0]:>11.1f} ms{medians[1]:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    main(parser.parse_args())
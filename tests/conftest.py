@@ -0,0 +1,110 @@
+"""Общие фикстуры: приложение на чистой SQLite в tmp_path и HTTP-клиент к нему.
+
+Настройки приложения можно переопределить маркером:
+
+    @pytest.mark.settings(REACTIONS_WRITE_BEHIND=True)
+"""
+import os
+
+import httpx
+import pytest
+
+# Settings требует параметры Postgres даже при работе с локальной SQLite.
+for name, value in {
+    "POSTGRES_DB": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
+
+from app.application import create_app, dispose_engines  # noqa: E402
+from app.core.cache import get_posts_cache, get_posts_flight, get_users_cache  # noqa: E402
+from app.core.db.db import get_engine, get_sessionmaker  # noqa: E402
+from app.core.db.models import Base  # noqa: E402
+from app.core.db.replicas import get_replica_set  # noqa: E402
+from app.core.live import get_live_counters  # noqa: E402
+from app.core.settings import get_settings  # noqa: E402
+from app.crud.rankings_refresher import get_rankings_refresher  # noqa: E402
+from app.crud.reactions_buffer import get_reactions_buffer  # noqa: E402
+
+PASSWORD = "test-password"
+CACHED_GETTERS = (
+    get_settings, get_engine, get_sessionmaker, get_replica_set, get_posts_cache,
+    get_posts_flight, get_users_cache, get_live_counters, get_reactions_buffer,
+    get_rankings_refresher,
+)
+
+
+def clear_caches() -> None:
+    for getter in CACHED_GETTERS:
+        getter.cache_clear()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def app(request, tmp_path, monkeypatch):
+    env = {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'test.sqlite3'}",
+        "DB_WARMUP": "False",
+        "TRENDING_REFRESH_INTERVAL": "0",
+    }
+    marker = request.node.get_closest_marker("settings")
+    if marker is not None:
+        env.update({name: str(value) for name, value in marker.kwargs.items()})
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    clear_caches()
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    application = create_app()
+    await application.router.startup()
+    yield application
+    await application.router.shutdown()
+    await dispose_engines()
+    clear_caches()
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def login(client):
+    """Зарегистрировать пользователя и вернуть заголовок авторизации."""
+    async def login(email: str) -> dict:
+        await client.post("/auth/register", json={
+            "email": email, "password": PASSWORD, "name": "test", "surname": "test",
+        })
+        response = await client.post("/auth/jwt/login", data={"username": email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return login
+
+
+@pytest.fixture
+def create_post(client):
+    async def create_post(headers: dict, title: str = "title", description: str = "description") -> str:
+        response = await client.post("/posts/", headers=headers, json={"title": title, "description": description})
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return create_post
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Один FakeRedis вместо каждого redis.asyncio.from_url."""
+    import redis.asyncio
+
+    from tests.fakes import FakeRedis
+
+    client = FakeRedis()
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url, **kwargs: client)
+    return client
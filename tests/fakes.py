@@ -0,0 +1,106 @@
+"""Замена redis.asyncio.Redis в памяти процесса для тестов."""
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.channels: set[str] = set()
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "FakePubSub":
+        self.redis.pubsubs.add(self)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.redis.pubsubs.discard(self)
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.add(channel)
+        self.messages.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": 1})
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self.messages.get()
+
+
+class FakePipeline:
+    """Транзакция WATCH/MULTI/EXEC: после watch команды выполняются сразу,
+    после multi - копятся до execute."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.watched: dict[str, int] = {}
+        self.commands: Optional[list] = None
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.watched, self.commands = {}, None
+
+    async def watch(self, *keys: str) -> None:
+        self.watched.update((key, self.redis.versions.get(key, 0)) for key in keys)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    def multi(self) -> None:
+        self.commands = []
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> "FakePipeline":
+        self.commands.append((key, value, ex))
+        return self
+
+    async def execute(self) -> list:
+        from redis.exceptions import WatchError
+
+        if any(self.redis.versions.get(key, 0) != version for key, version in self.watched.items()):
+            raise WatchError("Watched variable changed.")
+        return [await self.redis.set(*command) for command in self.commands]
+
+
+class FakeRedis:
+    """Поддерживает только то, что использует приложение: get, set с ex, delete,
+    pipeline с watch, publish и pubsub с subscribe и listen."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[Optional[float], bytes]] = {}
+        self.versions: dict[str, int] = {}
+        self.pubsubs: set[FakePubSub] = set()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        self.data[key] = (None if ex is None else time.monotonic() + ex, value)
+        self.versions[key] = self.versions.get(key, 0) + 1
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        for key in keys:
+            self.versions[key] = self.versions.get(key, 0) + 1
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        if not isinstance(message, bytes):
+            raise TypeError("message должен быть bytes")
+        receivers = [pubsub for pubsub in self.pubsubs if channel in pubsub.channels]
+        for pubsub in receivers:
+            pubsub.messages.put_nowait({"type": "message", "channel": channel.encode(), "data": message})
+        return len(receivers)
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
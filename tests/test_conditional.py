@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+from starlette.requests import Request
+
+from app.api.conditional import http_date, is_not_modified, validator_headers
+
+pytestmark = pytest.mark.anyio
+
+UPDATED_AT = datetime(2026, 1, 1, 12, 0, 0, 100000)
+
+
+def request(**headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_last_modified_waits_for_the_second_to_pass():
+    assert "Last-Modified" not in validator_headers('"1"', UPDATED_AT, now=UPDATED_AT + timedelta(milliseconds=500))
+    headers = validator_headers('"1"', UPDATED_AT, now=UPDATED_AT + timedelta(seconds=1))
+    assert headers["Last-Modified"] == "Thu, 01 Jan 2026 12:00:00 GMT"
+
+
+def test_change_in_the_same_second_is_not_304():
+    # Копия клиента получена в 12:00:00 с Last-Modified 12:00:00, реакция в 12:00:00.3.
+    since = http_date(UPDATED_AT)
+    changed_at = UPDATED_AT + timedelta(milliseconds=300)
+    headers = validator_headers('"2"', changed_at, now=changed_at + timedelta(milliseconds=100))
+    assert not is_not_modified(request(if_modified_since=since), headers)
+
+
+def test_if_modified_since_after_the_second_is_304():
+    headers = validator_headers('"1"', UPDATED_AT, now=UPDATED_AT + timedelta(seconds=5))
+    assert is_not_modified(request(if_modified_since=headers["Last-Modified"]), headers)
+    assert not is_not_modified(request(if_modified_since=http_date(UPDATED_AT - timedelta(seconds=1))), headers)
+
+
+async def test_like_after_get_is_visible_with_if_modified_since(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+    first = await client.get(f"/posts/{post_id}", headers=reader)
+    since = first.headers.get("Last-Modified", http_date(datetime.utcnow() - timedelta(seconds=1)))
+
+    await client.post(f"/likes/{post_id}", headers=reader)
+    second = await client.get(f"/posts/{post_id}", headers={**reader, "If-Modified-Since": since})
+
+    assert second.status_code == 200
+    assert second.json()["likes_count"] == 1
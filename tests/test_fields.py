@@ -0,0 +1,38 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_post_fields_and_include(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author, "Заголовок")
+    await client.post(f"/likes/{post_id}", headers=reader)
+
+    full = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    narrow = await client.get(
+        f"/posts/{post_id}", headers=reader, params={"fields": "title,likes_count", "include": ""}
+    )
+    likes_only = (await client.get(f"/posts/{post_id}", headers=reader, params={"include": "likes"})).json()
+
+    assert {"likes", "dislikes", "description"} <= full.keys()
+    assert narrow.json() == {"id": post_id, "title": "Заголовок", "likes_count": 1}
+    assert likes_only["likes"] == full["likes"] and "dislikes" not in likes_only
+    assert narrow.headers["etag"] != (await client.get(f"/posts/{post_id}", headers=reader)).headers["etag"]
+
+
+async def test_page_fields(client, login, create_post):
+    author = await login("author@test.local")
+    post_id = await create_post(author)
+
+    page = (await client.get("/posts/", headers=author, params={"fields": "user_id"})).json()
+    with_reactions = (await client.get("/posts/", headers=author, params={"include": "likes,dislikes"})).json()
+
+    assert page["items"] == [{"id": post_id, "user_id": page["items"][0]["user_id"]}]
+    assert with_reactions["items"][0]["likes"] == [] == with_reactions["items"][0]["dislikes"]
+
+
+async def test_unknown_field_rejected(client, login):
+    headers = await login("author@test.local")
+    response = await client.get("/posts/", headers=headers, params={"fields": "title,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
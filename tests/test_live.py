@@ -0,0 +1,47 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.live import CountsBroker, CountsDelta, RedisCountsBroker, counts_deltas, get_live_counters
+from tests.fakes import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+def test_counts_broker_is_abstract():
+    with pytest.raises(TypeError):
+        CountsBroker()
+
+
+def test_counts_deltas_skip_zero():
+    kept, cancelled = uuid.uuid4(), uuid.uuid4()
+    deltas = counts_deltas([kept, cancelled], [cancelled], [kept])
+    assert deltas == {kept: CountsDelta(1, 1)}
+
+
+async def test_redis_broker_round_trip():
+    broker = RedisCountsBroker(FakeRedis())
+    received = asyncio.Queue()
+    listener = asyncio.create_task(broker.listen(received.put_nowait))
+    await asyncio.sleep(0)
+    deltas = {uuid.uuid4(): CountsDelta(2, -1), uuid.uuid4(): CountsDelta(0, 1)}
+
+    await broker.publish(deltas)
+
+    assert await asyncio.wait_for(received.get(), 1) == deltas
+    listener.cancel()
+
+
+@pytest.mark.settings(LIVE_BROKER="redis", REDIS_URL="redis://live.test")
+async def test_like_reaches_redis_subscribers(fake_redis, client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+    live_counters = get_live_counters()
+    subscription = live_counters.subscribe([uuid.UUID(post_id)])
+    await asyncio.sleep(0)
+
+    await client.post(f"/likes/{post_id}", headers=reader)
+
+    assert await subscription.get(timeout=1) == {uuid.UUID(post_id): CountsDelta(1, 0)}
+    live_counters.unsubscribe(subscription)
@@ -0,0 +1,41 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def metric_types(text: str) -> dict[str, str]:
+    return dict(
+        line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE ")
+    )
+
+
+@pytest.mark.settings(REACTIONS_WRITE_BEHIND=True, METRICS_TOKEN="scrape")
+async def test_monotonic_values_are_counters(client, login, create_post):
+    headers = await login("author@test.local")
+    post_id = await create_post(headers)
+    await client.get(f"/posts/{post_id}", headers=headers)
+    await client.get(f"/posts/{post_id}", headers=headers)
+
+    text = (await client.get("/metrics", headers={"Authorization": "Bearer scrape"})).text
+    types = metric_types(text)
+
+    for name in (
+        "posts_cache_hits_total", "posts_cache_misses_total", "posts_load_calls_total",
+        "reactions_buffer_flushed_total", "reactions_buffer_dropped_total", "db_queries_total",
+    ):
+        assert types[name] == "counter", name
+    for name in ("posts_load_in_flight", "live_connections", "reactions_buffer_queued"):
+        assert types[name] == "gauge", name
+    assert "posts_cache_hits_total 1\n" in text
+    assert "posts_cache_hits " not in text
+
+
+async def test_metrics_disabled_without_token(client):
+    assert (await client.get("/metrics")).status_code == 404
+
+
+@pytest.mark.settings(METRICS_TOKEN="scrape")
+async def test_metrics_require_token(client, login):
+    user = await login("author@test.local")
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers=user)).status_code == 401
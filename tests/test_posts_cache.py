@@ -0,0 +1,113 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import (
+    TOMBSTONE, CacheBackend, CachedPost, InMemoryCacheBackend, PostsCache, RedisCacheBackend
+)
+from app.core.singleflight import SingleFlight
+from tests.fakes import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@pytest.mark.settings(CACHE_BACKEND="redis", REDIS_URL="redis://cache.test")
+async def test_redis_backend_read_through_and_invalidation(fake_redis, client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+
+    first = await client.get(f"/posts/{post_id}", headers=reader)
+    assert f"cache:post:{post_id}" in fake_redis.data
+    assert (await client.get(f"/posts/{post_id}", headers=reader)).content == first.content
+
+    await client.post(f"/likes/{post_id}", headers=reader)
+    assert (await fake_redis.get(f"cache:post:{post_id}")).startswith(TOMBSTONE)
+    assert (await client.get(f"/posts/{post_id}", headers=reader)).json()["likes_count"] == 1
+
+
+def cached_post(version: int) -> CachedPost:
+    return CachedPost(version, datetime(2024, 1, 1), b"{}")
+
+
+async def test_load_started_before_invalidation_is_not_cached():
+    posts_cache = PostsCache(InMemoryCacheBackend(10, 30))
+    loaded_at = time.time()
+    await posts_cache.invalidate("post")
+
+    assert not await posts_cache.set("post", cached_post(1), loaded_at)
+    assert await posts_cache.get("post") is None
+    assert await posts_cache.set("post", cached_post(2), time.time())
+    assert (await posts_cache.get("post")).version == 2
+
+
+async def test_load_within_replica_lag_is_not_cached():
+    posts_cache = PostsCache(InMemoryCacheBackend(10, 30), replica_lag=5)
+    await posts_cache.invalidate("post")
+
+    assert not await posts_cache.set("post", cached_post(1), time.time())
+    assert await posts_cache.set("post", cached_post(1), time.time() + 5.1)
+    assert posts_cache.stats() == {"hits": 0, "misses": 0, "rejected": 1}
+
+
+async def test_redis_set_loses_to_concurrent_invalidation():
+    posts_cache = PostsCache(RedisCacheBackend(FakeRedis(), ttl=30))
+    loaded_at = time.time()
+
+    backend_get = posts_cache.backend.client.get
+
+    async def get_then_invalidate(key):
+        # Другой воркер инвалидирует пост между проверкой и записью.
+        data = await backend_get(key)
+        await posts_cache.invalidate("post")
+        return data
+
+    posts_cache.backend.client.get = get_then_invalidate
+    assert not await posts_cache.set("post", cached_post(1), loaded_at)
+    posts_cache.backend.client.get = backend_get
+    assert await posts_cache.get("post") is None
+    assert await posts_cache.set("post", cached_post(2), time.time())
+    assert (await posts_cache.get("post")).version == 2
+
+
+async def test_single_flight_coalesces_concurrent_loads():
+    flight, loads = SingleFlight(), 0
+    released = asyncio.Event()
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await released.wait()
+        return loads
+
+    waiters = [asyncio.create_task(flight.do("post", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    released.set()
+
+    assert await asyncio.gather(*waiters) == [1, 1, 1]
+    assert flight.stats() == {"calls": 3, "coalesced": 2, "in_flight": 0}
+
+
+async def test_single_flight_retries_after_leader_cancelled():
+    flight, loads = SingleFlight(), 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        if loads == 1:
+            await asyncio.sleep(10)
+        return loads
+
+    leader = asyncio.create_task(flight.do("post", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.do("post", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == 2
@@ -0,0 +1,143 @@
+import functools
+
+import orjson
+import pytest
+
+from app.api.routers import posts as posts_router
+from app.crud.posts_import import (
+    IMPORT_MAX_ERRORS, STR_COLUMNS_MISMATCH, STR_INVALID_JSON, STR_NOT_AN_OBJECT,
+    ImportFormat, PostsImporter, iter_lines,
+)
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakePostsService:
+    """Запоминает вставленные посты вместо записи в базу."""
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.posts = []
+
+    async def insert_posts(self, posts, user_id):
+        self.posts.extend(posts)
+        return len(posts)
+
+
+async def stream(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def run_import(import_format, *parts, chunk_size=1000):
+    service = FakePostsService()
+    importer = PostsImporter(service, chunk_size)
+    reports = [report async for report in importer.run(stream(*parts), import_format, USER_ID)]
+    return service, reports
+
+
+def ndjson(*records) -> bytes:
+    return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+async def test_ndjson_mixed_lines():
+    body = (
+        ndjson(dict(title="Первый", description="один"))
+        + b"{not json\n"
+        + b"\n"
+        + b"[1, 2]\n"
+        + ndjson(dict(description="без заголовка"), dict(title="Второй", description="два"))
+    )
+    service, reports = await run_import(ImportFormat.ndjson, body)
+
+    assert [post["title"] for post in service.posts] == ["Первый", "Второй"]
+    (report,) = reports
+    assert (report.first_line, report.last_line, report.inserted, report.rejected) == (1, 6, 2, 3)
+    assert [error["line"] for error in report.errors] == [2, 4, 5]
+    assert report.errors[0]["error"] == STR_INVALID_JSON
+    assert report.errors[1]["error"] == STR_NOT_AN_OBJECT
+    assert report.errors[2]["error"].startswith("title")
+
+
+async def test_csv_with_header():
+    body = (
+        "title,description\r\n"
+        "Первый,один\r\n"
+        '"Второй, с запятой","строка\nс переводом"\r\n'
+        "Лишнее,поле,тут\r\n"
+    ).encode()
+    service, reports = await run_import(ImportFormat.csv, body)
+
+    assert service.posts == [
+        dict(title="Первый", description="один"),
+        dict(title="Второй, с запятой", description="строка\nс переводом"),
+    ]
+    (report,) = reports
+    assert (report.inserted, report.rejected) == (2, 1)
+    assert report.errors == [dict(line=5, error=STR_COLUMNS_MISMATCH)]
+
+
+async def test_line_straddles_read_boundary():
+    body = ndjson(dict(title="Привет", description="мир"), dict(title="Пока", description="мир"))
+    # Разрез внутри первой строки и посреди двухбайтовой буквы.
+    cut = body.index("Привет".encode()) + 1
+    lines = [line async for line in iter_lines(stream(body[:cut], body[cut:-3], body[-3:]))]
+
+    assert [number for number, _ in lines] == [1, 2]
+    service, _ = await run_import(ImportFormat.ndjson, body[:cut], body[cut:-3], body[-3:])
+    assert [post["title"] for post in service.posts] == ["Привет", "Пока"]
+
+
+async def test_last_line_without_newline():
+    body = ndjson(dict(title="Первый", description="один"))
+    body += orjson.dumps(dict(title="Второй", description="два"))
+    service, reports = await run_import(ImportFormat.ndjson, body)
+
+    assert len(service.posts) == 2
+    assert reports[0].last_line == 2
+
+
+async def test_errors_capped_per_chunk():
+    body = b"{}\n" * (IMPORT_MAX_ERRORS + 50) + ndjson(dict(title="Пост", description="текст"))
+    service, reports = await run_import(ImportFormat.ndjson, body, chunk_size=1000)
+
+    (report,) = reports
+    assert (report.inserted, report.rejected) == (1, IMPORT_MAX_ERRORS + 50)
+    assert len(report.errors) == IMPORT_MAX_ERRORS
+
+
+async def test_chunks_split_by_size():
+    body = ndjson(*(dict(title=f"Пост {number}", description="текст") for number in range(5)))
+    service, reports = await run_import(ImportFormat.ndjson, body, chunk_size=2)
+
+    assert [(report.first_line, report.last_line, report.inserted) for report in reports] == [
+        (1, 2, 2), (3, 4, 2), (5, 5, 1),
+    ]
+    assert len(service.posts) == 5
+
+
+async def test_import_reports_first_failing_chunks(client, login, monkeypatch):
+    monkeypatch.setattr(posts_router, "PostsImporter", functools.partial(PostsImporter, chunk_size=2))
+    monkeypatch.setattr(posts_router, "IMPORT_MAX_CHUNKS", 2)
+    headers = await login("author@test.local")
+    body = b"{}\n" * 7 + ndjson(dict(title="Пост", description="текст"))
+
+    response = await client.post(
+        "/posts/import", params=dict(format="ndjson"), content=body, headers=headers
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["inserted"], report["rejected"]) == (1, 7)
+    assert [chunk["chunk"] for chunk in report["chunks"]] == [1, 2]
+    assert report["omitted_chunks"] == 2
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.rankings_crud import trending_score
+from app.crud.rankings_refresher import get_rankings_refresher
+
+pytestmark = pytest.mark.anyio
+
+
+def test_trending_score_half_life():
+    created_at = datetime(2024, 1, 1)
+    older = trending_score(4, 0, created_at, half_life_hours=12)
+    newer = trending_score(2, 0, created_at + timedelta(hours=12), half_life_hours=12)
+    assert newer == pytest.approx(older)
+    assert trending_score(0, 4, created_at, 12) < trending_score(0, 0, created_at, 12)
+
+
+async def test_top_follows_reactions(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    other_reader = await login("other@test.local")
+    first, second = await create_post(author), await create_post(author)
+    refresher = get_rankings_refresher()
+
+    assert await refresher.refresh() == 2
+    top = (await client.get("/posts/top", headers=reader)).json()
+    assert [post["id"] for post in top["items"]] == [second, first]
+
+    await client.post(f"/likes/{first}", headers=reader)
+    await client.post(f"/likes/{first}", headers=other_reader)
+    await refresher.refresh()
+    top = (await client.get("/posts/top", headers=reader, params={"fields": "likes_count"})).json()
+    assert top["items"] == [{"id": first, "likes_count": 2}, {"id": second, "likes_count": 0}]
@@ -0,0 +1,56 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def item(post_id: str, reaction: str, action: str) -> dict:
+    return {"post_id": post_id, "reaction": reaction, "action": action}
+
+
+async def test_bulk_create_and_delete(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+
+    response = await client.post("/reactions/bulk", headers=reader, json={"items": [
+        item(post_id, "like", "create"),
+        item(post_id, "dislike", "create"),
+        item(post_id, "like", "delete"),
+    ]})
+
+    assert [result["status"] for result in response.json()] == ["created", "forbidden", "deleted"]
+    post = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    assert (post["likes_count"], post["dislikes_count"]) == (0, 0)
+
+
+async def test_bulk_net_noop_keeps_existing_id(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+    like_id = (await client.post(f"/likes/{post_id}", headers=reader)).json()["id"]
+
+    response = await client.post("/reactions/bulk", headers=reader, json={"items": [
+        item(post_id, "like", "delete"),
+        item(post_id, "like", "create"),
+    ]})
+
+    deleted, created = response.json()
+    assert deleted == {**item(post_id, "like", "delete"), "id": like_id, "status": "deleted"}
+    assert created == {**item(post_id, "like", "create"), "id": like_id, "status": "created"}
+    post = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    assert post["likes_count"] == 1
+    assert [like["id"] for like in post["likes"]] == [like_id]
+
+
+async def test_bulk_create_then_delete_reports_one_id(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+
+    response = await client.post("/reactions/bulk", headers=reader, json={"items": [
+        item(post_id, "like", "create"),
+        item(post_id, "like", "delete"),
+    ]})
+
+    created, deleted = response.json()
+    assert (created["status"], deleted["status"]) == ("created", "deleted")
+    assert created["id"] == deleted["id"] is not None
+    post = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    assert (post["likes_count"], post["likes"]) == (0, [])
@@ -0,0 +1,175 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.api.request_models.reactions import ReactionAction, ReactionType
+from app.core.db.db import async_session
+from app.core.db.models import Likes, User
+from app.crud.dislikes_crud import DislikesService
+from app.crud.likes_crud import LikesService
+from app.core.cache import PostsCache
+from app.crud import reactions_buffer
+from app.crud.reactions_buffer import ReactionsBuffer, get_reactions_buffer
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.settings(REACTIONS_WRITE_BEHIND=True, REACTIONS_FLUSH_INTERVAL=60),
+]
+
+
+async def likes_count() -> int:
+    async with async_session() as session:
+        return await session.scalar(select(func.count()).select_from(Likes))
+
+
+async def test_flush_skips_deleted_post(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    deleted_post, kept_post = await create_post(author), await create_post(author)
+
+    assert (await client.post(f"/likes/{deleted_post}", headers=reader)).status_code == 200
+    assert (await client.delete(f"/posts/{deleted_post}", headers=author)).status_code == 200
+    assert (await client.post(f"/likes/{kept_post}", headers=reader)).status_code == 200
+    buffer = get_reactions_buffer()
+    await buffer.stop()
+
+    assert (buffer.flushed, buffer.dropped) == (2, 0)
+    assert await likes_count() == 1
+    post = (await client.get(f"/posts/{kept_post}", headers=reader)).json()
+    assert post["likes_count"] == 1
+
+
+async def test_flush_retries_by_post_on_integrity_error(client, login, create_post, monkeypatch):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    broken_post, kept_post = await create_post(author), await create_post(author)
+    insert_likes = LikesService.insert_likes
+
+    async def insert_likes_failing(self, likes):
+        if any(str(like["post_id"]) == broken_post for like in likes):
+            raise IntegrityError("INSERT", {}, Exception("likes_post_id_fkey"))
+        return await insert_likes(self, likes)
+
+    monkeypatch.setattr(LikesService, "insert_likes", insert_likes_failing)
+    await client.post(f"/likes/{broken_post}", headers=reader)
+    await client.post(f"/likes/{kept_post}", headers=reader)
+    buffer = get_reactions_buffer()
+    await buffer.stop()
+
+    assert (buffer.flushed, buffer.dropped) == (1, 1)
+    assert await likes_count() == 1
+
+
+
+async def test_flush_retries_transient_error(client, login, create_post, monkeypatch):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+    insert_likes, failures = LikesService.insert_likes, [OperationalError("INSERT", {}, Exception("connection lost"))]
+
+    async def insert_likes_flaky(self, likes):
+        if failures:
+            raise failures.pop()
+        return await insert_likes(self, likes)
+
+    monkeypatch.setattr(LikesService, "insert_likes", insert_likes_flaky)
+    monkeypatch.setattr(reactions_buffer, "FLUSH_RETRY_DELAY", 0)
+    await client.post(f"/likes/{post_id}", headers=reader)
+    buffer = get_reactions_buffer()
+    await buffer.stop()
+
+    assert (buffer.flushed, buffer.dropped, buffer.retried) == (1, 0, 1)
+    assert await likes_count() == 1
+
+
+@pytest.mark.settings(REACTIONS_WRITE_BEHIND=True, REACTIONS_FLUSH_INTERVAL=60, REACTIONS_BATCH_SIZE=1)
+async def test_cache_error_keeps_consumer_alive(client, login, create_post, monkeypatch):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    first_post, second_post = await create_post(author), await create_post(author)
+
+    async def invalidate_failing(self, *post_ids):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(PostsCache, "invalidate", invalidate_failing)
+    buffer = get_reactions_buffer()
+    await client.post(f"/likes/{first_post}", headers=reader)
+    while buffer.flushed < 1:
+        await asyncio.sleep(0.01)
+    assert (await client.post(f"/likes/{second_post}", headers=reader)).status_code == 200
+    await buffer.stop()
+
+    assert (buffer.flushed, buffer.dropped) == (2, 0)
+    assert await likes_count() == 2
+
+async def test_bulk_sees_buffered_like(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+
+    assert (await client.post(f"/likes/{post_id}", headers=reader)).status_code == 200
+    response = await client.post("/reactions/bulk", headers=reader, json={"items": [
+        {"post_id": post_id, "reaction": "dislike", "action": "create"},
+    ]})
+    await get_reactions_buffer().stop()
+
+    assert response.json()[0]["status"] == "forbidden"
+    post = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    assert (post["likes_count"], post["dislikes_count"]) == (1, 0)
+
+
+async def test_flush_skips_like_when_dislike_written_elsewhere(client, login, create_post):
+    author, reader = await login("author@test.local"), await login("reader@test.local")
+    post_id = await create_post(author)
+
+    assert (await client.post(f"/likes/{post_id}", headers=reader)).status_code == 200
+    # Дизлайк, записанный другим воркером в обход этого буфера.
+    async with async_session() as session:
+        user_id = (await session.execute(
+            select(User.id).where(User.email == "reader@test.local")
+        )).scalar()
+        assert await DislikesService(session).create_dislike(UUID(post_id), user_id) is not None
+    await get_reactions_buffer().stop()
+
+    assert await likes_count() == 0
+    post = (await client.get(f"/posts/{post_id}", headers=reader)).json()
+    assert (post["likes_count"], post["dislikes_count"]) == (0, 1)
+
+
+def event_args(number: int) -> tuple:
+    return ReactionAction.create, ReactionType.like, uuid4(), UUID(int=number), UUID(int=0)
+
+
+async def test_cancelled_put_leaves_no_pending(monkeypatch):
+    async def flush(self, batch):
+        self._forget(batch)
+
+    monkeypatch.setattr(ReactionsBuffer, "flush", flush)
+    buffer = ReactionsBuffer(max_size=1, batch_size=10, flush_interval=60)
+    await buffer.start()
+    await buffer.put(*event_args(1))
+    await asyncio.sleep(0)
+    await buffer.put(*event_args(2))
+    blocked = asyncio.create_task(buffer.put(*event_args(3)))
+    await asyncio.sleep(0)
+    blocked.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await blocked
+    assert (ReactionType.like, UUID(int=3), UUID(int=0)) not in buffer.pending
+    await buffer.stop()
+    assert buffer.pending == {}
+
+
+async def test_put_refuses_when_consumer_died(monkeypatch):
+    async def flush(self, batch):
+        raise RuntimeError("flush failed")
+
+    monkeypatch.setattr(ReactionsBuffer, "flush", flush)
+    buffer = ReactionsBuffer(max_size=1, batch_size=10, flush_interval=0)
+    await buffer.start()
+    await buffer.put(*event_args(1))
+    while not buffer._task.done():
+        await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError, match="не запущен"):
+        await buffer.put(*event_args(2))
+    await buffer.stop()
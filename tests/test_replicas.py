@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from starlette.responses import PlainTextResponse
+
+from app.core.db.replicas import READ_PRIMARY_COOKIE, ReadYourWritesMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+async def ok(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+@pytest.mark.parametrize("method, path, pinned", [
+    ("POST", "/posts/", True),
+    ("DELETE", "/likes/1", True),
+    ("GET", "/posts/", False),
+    ("POST", "/auth/jwt/login", False),
+    ("POST", "/auth/register", False),
+])
+async def test_read_primary_cookie_only_after_data_writes(method, path, pinned):
+    app = ReadYourWritesMiddleware(ok, max_age=5)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.request(method, path)
+    assert (READ_PRIMARY_COOKIE in response.cookies) is pinned
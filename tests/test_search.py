@@ -0,0 +1,35 @@
+import pytest
+
+from app.core.db.search import sqlite_match_query
+
+pytestmark = pytest.mark.anyio
+
+
+def test_sqlite_match_query_quotes_operators():
+    assert sqlite_match_query('кот OR "пес"') == '"кот" "OR" """пес"""'
+
+
+async def test_search_matches_all_words(client, login, create_post):
+    author = await login("author@test.local")
+    both = await create_post(author, "Рыжий кот", "спит на диване")
+    await create_post(author, "Рыжий пес", "лает во дворе")
+
+    response = await client.get("/posts/search", headers=author, params={"q": "рыжий диване"})
+
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()["items"]] == [both]
+
+
+async def test_search_follows_edits_and_pages(client, login, create_post):
+    author = await login("author@test.local")
+    post_ids = {await create_post(author, f"Заметка {number}", "про поиск") for number in range(3)}
+    edited = post_ids.pop()
+    await client.patch(f"/posts/{edited}", headers=author, json={"title": "Черновик", "description": "пусто"})
+
+    first = (await client.get("/posts/search", headers=author, params={"q": "поиск", "limit": 1})).json()
+    second = (await client.get(
+        "/posts/search", headers=author, params={"q": "поиск", "limit": 1, "cursor": first["next_cursor"]}
+    )).json()
+
+    assert {first["items"][0]["id"], second["items"][0]["id"]} == post_ids
+    assert "next_cursor" not in second
@@ -0,0 +1,15 @@
+import pytest
+
+from app.server import worker_pool_limits
+
+
+def test_pool_limits_leave_room_for_reload():
+    pool_size, max_overflow = worker_pool_limits(90, 4, 20, 10)
+    assert (pool_size, max_overflow) == (18, 0)
+    assert 5 * (pool_size + max_overflow) <= 90
+    assert worker_pool_limits(90, 2, 10, 20) == (10, 20)
+
+
+def test_pool_limits_reject_too_many_workers():
+    with pytest.raises(ValueError):
+        worker_pool_limits(4, 4, 5, 10)